@@ -0,0 +1,65 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : apk.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import fnmatch
+import mmap
+import struct
+import zipfile
+from typing import Iterator, Tuple
+from parse import ELF
+
+'''
+不解压直接解析 APK 中的 lib/<abi>/*.so:
+- 未压缩(stored)的条目: 整个 APK 只映射一次, ELF 直接解析映射中对应区间的切片, 不拷贝, 不落地临时文件
+- 压缩(deflated)的条目: 解压到内存一次后在 bytes 上解析
+
+    for name, elf in iter_apk_libs('app.apk'):
+        print(name, elf.elf_header.elf_ehdr.e_machine, len(elf.dynamic_table))
+
+生成器在取下一项时关闭上一项的 ELF, 需要保留的数据请在循环内取出
+'''
+
+LOCAL_HEADER = struct.Struct('<4s22xHH')   # 本地文件头: 签名, ..., 文件名长度, 扩展字段长度
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+
+def data_offset(data, info: zipfile.ZipInfo) -> int:
+    '''
+    条目数据在 APK 中的偏移: 本地文件头(30 字节) + 文件名 + 扩展字段之后
+    本地文件头中的扩展字段长度可能与中央目录不同(如 zipalign 的填充), 必须读本地文件头
+    '''
+    signature, name_size, extra_size = LOCAL_HEADER.unpack_from(data, info.header_offset)
+    if signature != LOCAL_HEADER_SIGNATURE:
+        raise Exception("%s 本地文件头异常" % (info.filename))
+    return info.header_offset + LOCAL_HEADER.size + name_size + extra_size
+
+
+def iter_apk_libs(apk_path: str, pattern: str = 'lib/*/*.so') -> Iterator[Tuple[str, ELF]]:
+    with zipfile.ZipFile(apk_path) as archive, open(apk_path, 'rb') as file:
+        apk_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(apk_map)
+        try:
+            for info in archive.infolist():
+                if info.is_dir() or not fnmatch.fnmatch(info.filename, pattern):
+                    continue
+                if info.compress_type == zipfile.ZIP_STORED:
+                    offset = data_offset(view, info)
+                    elf = ELF(view[offset:offset + info.file_size])
+                else:
+                    elf = ELF(archive.read(info))
+                try:
+                    yield info.filename, elf
+                finally:
+                    elf.close()
+        finally:
+            view.release()
+            try:
+                apk_map.close()
+            except BufferError:     # 调用方仍持有切片, 交给 GC 回收
+                pass
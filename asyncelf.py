@@ -0,0 +1,277 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : asyncelf.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, List
+from batch import walk, worker_pool
+from cache import dump_elf, load_elf
+from parse import ELF
+
+'''
+asyncio 前端: 解析在有界的线程池或进程池中进行, 不阻塞事件循环
+
+    pool = ParsePool(max_workers=8, max_pending=256, timeout=5.0)
+    elf = await AsyncELF.open('libfoo.so', pool=pool)      # 也可以传入上传得到的 bytes
+    elf.symbol_table                                        # read_elf 读取的表已解析, 直接访问
+    await elf.load('relocations', 'symbol_versions')        # 其余按需解析的表在池中解析
+    await pool.aclose()
+
+- 并发: 同时在池中执行的任务不超过 max_workers, 其余的在信号量上按到达顺序排队, 不在执行器内部堆积;
+        任务结束(包括被取消后仍在运行的)才释放名额, 池不会超额占用线程/进程
+- 背压: 排队的任务达到 max_pending 时立即抛出 ParsePoolBusy, 服务可据此返回 503, 而不是让队列和尾延迟无限增长
+- 超时: timeout 从调用开始计时, 包含排队时间, 超时抛出 TimeoutError
+- 取消: 调用方被取消时, 排队中的任务直接放弃, 尚未开始的任务从执行器中撤销; 已在运行的解析无法中断, 结果被丢弃
+- 线程池(默认): 解析是 CPU 密集的 Python 代码, 受 GIL 限制, 主要作用是不阻塞事件循环;
+  进程池(use_processes=True): 多核并行, worker 把解析结果按 cache.dump_elf 的格式打包返回, 主进程用 load_elf 重建
+'''
+
+
+class ParsePoolBusy(Exception):
+    '''
+    排队的任务已达 max_pending
+    '''
+
+
+def parse_elf(source, use_sections: bool = True) -> ELF:
+    '''
+    解析路径或 bytes, 读取 read_elf 覆盖的全部表; 不是有效的 ELF 时抛出异常
+    '''
+    elf = ELF(source, use_sections=use_sections)
+    closing_call(elf, elf.read_elf)
+    if not elf.is_valid():     # 只用到已缓存的 ELF 头, 不会再打开文件
+        raise Exception("%s 不是有效的 ELF 文件" % (source if isinstance(source, (str, os.PathLike)) else '<bytes>'))
+    return elf
+
+
+def closing_call(elf: ELF, func: Callable, *args):
+    '''
+    调用 func(*args), 期间为路径输入打开的文件和映射在结束时关闭, 解析结果不长期占用文件描述符;
+    引用映射的缓存(如 .dynsym 的哈希表)由 ELF.close() 一并丢弃, 下一次调用时在新的映射上重建
+    '''
+    opened = elf.file is None and elf.view is None
+    try:
+        return func(*args)
+    finally:
+        if opened:
+            elf.close()
+
+
+def parse_packed(source, use_sections: bool = True) -> bytes:
+    '''
+    在 worker 进程中解析, 返回 cache.dump_elf 的打包结果
+    '''
+    return dump_elf(parse_elf(source, use_sections))
+
+
+class ParsePool(object):
+    def __init__(self, max_workers: int = None, max_pending: int = None, timeout: float = None,
+                 use_processes: bool = False, max_tasks_per_child: int = None, memory_limit: int = 0):
+        '''
+        max_workers: 同时执行的解析数, 默认为 CPU 核数
+        max_pending: 允许排队等待的任务数, None 为不限
+        timeout: 每个文件的默认超时(秒), None 为不限
+        use_processes: 在进程池中解析; max_tasks_per_child / memory_limit(MB) 与 batch.py 相同
+        '''
+        super(ParsePool, self).__init__()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.use_processes = use_processes
+        self.threads = ThreadPoolExecutor(self.max_workers, thread_name_prefix='elfparse')     # 按需解析和线程模式的解析
+        self.processes: Executor = None
+        if use_processes:
+            self.processes = worker_pool(self.max_workers, max_tasks_per_child, memory_limit)
+        self.slots: asyncio.Semaphore = None     # 在第一次使用时创建, 绑定当时的事件循环
+        self.running = 0
+        self.waiting = 0
+
+    async def run(self, func: Callable, *args, timeout: float = None, executor: Executor = None):
+        '''
+        在池中执行 func(*args), 受并发上限、排队上限和超时约束
+        '''
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.max_workers)
+        if self.max_pending is not None and self.slots.locked() and self.waiting >= self.max_pending:
+            raise ParsePoolBusy("解析队列已满: %d 个任务在排队" % (self.waiting))
+        timeout = self.timeout if timeout is None else timeout
+        async with asyncio.timeout(timeout):
+            self.waiting += 1
+            try:
+                await self.slots.acquire()
+            finally:
+                self.waiting -= 1
+            loop = asyncio.get_running_loop()
+            try:
+                future = (executor or self.threads).submit(func, *args)
+            except BaseException:
+                self.slots.release()
+                raise
+            self.running += 1
+            future.add_done_callback(lambda done: self.release(loop))
+            return await asyncio.wrap_future(future)    # 被取消时一并撤销尚未开始的任务
+
+    def release(self, loop: asyncio.AbstractEventLoop):
+        '''
+        执行器中的任务结束(完成、出错或被撤销)时在工作线程中调用, 回到事件循环释放名额
+        '''
+        def release():
+            self.running -= 1
+            self.slots.release()
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:    # 事件循环已关闭
+            pass
+
+    async def parse(self, source, timeout: float = None, use_sections: bool = True) -> ELF:
+        if self.processes is None:
+            return await self.run(parse_elf, source, use_sections, timeout=timeout)
+        data = await self.run(parse_packed, source, use_sections, timeout=timeout, executor=self.processes)
+        return load_elf(source, data)
+
+    async def aclose(self):
+        '''
+        撤销排队中的任务并等待执行中的结束, 等待在默认执行器中进行, 不阻塞事件循环
+        '''
+        loop = asyncio.get_running_loop()
+        for executor in (self.threads, self.processes):
+            if executor is not None:
+                await loop.run_in_executor(None, lambda: executor.shutdown(wait=True, cancel_futures=True))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+
+_default_pool: ParsePool = None
+
+
+def get_default_pool() -> ParsePool:
+    '''
+    未指定 pool 时使用的线程池, 并发数为 CPU 核数, 不限排队和超时
+    '''
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ParsePool()
+    return _default_pool
+
+
+class AsyncELF(object):
+    '''
+    包装一个已解析的 ELF: read_elf 读取的表直接作为属性访问, 其余按需解析的表用 load() 在池中解析
+
+    ELF 的按需属性不是线程安全的(先赋空表再填充), load() 和 call() 在工作线程中持有本对象的锁,
+    同一个 ELF 上的并发请求依次执行; 期间打开的文件和映射在结束时关闭
+    '''
+    def __init__(self, elf: ELF, pool: ParsePool):
+        super(AsyncELF, self).__init__()
+        self.elf = elf
+        self.pool = pool
+        self.lock = threading.Lock()
+
+    @classmethod
+    async def open(cls, source, pool: ParsePool = None, timeout: float = None, use_sections: bool = True) -> 'AsyncELF':
+        '''
+        source 为路径或 bytes(如上传的内容); timeout 为 None 时使用 pool 的默认超时
+        '''
+        pool = pool or get_default_pool()
+        return cls(await pool.parse(source, timeout, use_sections), pool)
+
+    async def load(self, *names: str, timeout: float = None):
+        '''
+        在池中读取 names 中的属性(如 'relocations'、'symbol_versions'), 之后可直接访问
+        '''
+        elf = self.elf
+
+        def load():
+            for name in names:
+                getattr(elf, name)
+        await self.pool.run(self.locked, load, timeout=timeout)
+
+    async def call(self, func: Callable, *args, timeout: float = None):
+        '''
+        在池中调用 func(elf, *args), 用于 lookup_symbol、symbolize_many 等可能读取文件的方法
+        '''
+        return await self.pool.run(self.locked, func, self.elf, *args, timeout=timeout)
+
+    def locked(self, func: Callable, *args):
+        '''
+        在工作线程中持有锁调用 func(*args)
+        '''
+        with self.lock:
+            return closing_call(self.elf, func, *args)
+
+    def __getattr__(self, name: str):
+        return getattr(self.elf, name)
+
+
+async def run(paths: List[str], pattern: str = '*.so', concurrency: int = 100, lookup: str = None, **kwargs) -> dict:
+    '''
+    模拟 concurrency 个并发请求解析 paths 下的文件, 返回延迟分布;
+    lookup 为符号名时每个请求在解析后通过 call() 查找两次(第一次调用结束时已关闭文件), 结果不一致计为错误
+    '''
+    files = list(walk(paths, pattern))
+    latencies = []
+    errors = {}
+    start = time.perf_counter()
+    async with ParsePool(**kwargs) as pool:
+        requests = asyncio.Semaphore(concurrency)
+
+        async def request(path: str):
+            async with requests:
+                begin = time.perf_counter()
+                try:
+                    elf = await AsyncELF.open(path, pool=pool)
+                    if lookup is not None:
+                        first = await elf.call(ELF.lookup_symbol, lookup)
+                        second = await elf.call(ELF.lookup_symbol, lookup)
+                        if repr(first) != repr(second):
+                            raise Exception("%s: 两次查找 %s 的结果不一致" % (path, lookup))
+                except Exception as err:
+                    errors[type(err).__name__] = errors.get(type(err).__name__, 0) + 1
+                    return
+                latencies.append(time.perf_counter() - begin)
+        await asyncio.gather(*(request(path) for path in files))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0.0
+    return {'files': len(files), 'parsed': len(latencies), 'errors': errors, 'seconds': elapsed,
+            'p50': percentile(0.5), 'p99': percentile(0.99), 'max': latencies[-1] if latencies else 0.0}
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='以 asyncio 并发解析 ELF 文件, 输出延迟分布')
+    parser.add_argument('paths', nargs='+', help='目录或文件')
+    parser.add_argument('-p', '--pattern', default='*.so', help='文件名匹配模式')
+    parser.add_argument('-c', '--concurrency', type=int, default=100, help='并发请求数')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='同时执行的解析数, 默认为 CPU 核数')
+    parser.add_argument('--max-pending', type=int, default=None, help='允许排队的任务数, 超过时拒绝')
+    parser.add_argument('--timeout', type=float, default=None, help='每个文件的超时(秒)')
+    parser.add_argument('--processes', action='store_true', help='在进程池中解析')
+    parser.add_argument('--lookup', default=None, help='每个文件解析后通过 AsyncELF.call 查找该符号两次')
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(run(args.paths, args.pattern, args.concurrency, args.lookup, max_workers=args.workers,
+                            max_pending=args.max_pending, timeout=args.timeout, use_processes=args.processes))
+    print("parsed %d/%d files in %.2fs, p50 %.1fms, p99 %.1fms, max %.1fms, errors %s"
+          % (stats['parsed'], stats['files'], stats['seconds'], stats['p50'] * 1e3, stats['p99'] * 1e3,
+             stats['max'] * 1e3, stats['errors']), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,12 +7,25 @@
 # Author     ：Yooha
 """
 
-import abc
 from io import TextIOWrapper
 import struct
+import elflog
+from strtab import StringTable
+
+
+def record_layout(*fields: tuple) -> tuple:
+    '''
+    由 (字段名, struct 格式符) 的声明表生成 FIELDS 和预编译的 LAYOUT, 32/64 位的差异只体现在这张表里
+    LAYOUT 固定为小端序, 大端版本由 Elf_Record 在定义子类时一并生成, 见 Elf_Record.for_data
+    '''
+    return tuple(name for name, fmt in fields), struct.Struct('<' + ''.join(fmt for name, fmt in fields))
 
 
 class Elf_e_ident(object):
+    __slots__ = ('file_identification', 'ei_class_2', 'ei_data', 'ei_version', 'ei_osabi',
+                 'ei_abiversion', 'ei_pad', 'ei_nident_SIZE')
+    LAYOUT = struct.Struct('=4sBBBBB6sB')   # e_ident 固定 16 字节
+
     def __init__(self):
         super(Elf_e_ident, self).__init__()
         self.file_identification = None    # Magic 前4个字节固定是 7F 45 4C 46; 45 4C 46 是ELF的ascii码；
@@ -24,325 +37,215 @@ class Elf_e_ident(object):
         self.ei_pad = None                 #
         self.ei_nident_SIZE = None         #
 
+    @classmethod
+    def from_bytes(cls, data) -> object:
+        e_ident = cls()
+        e_ident.unpack(data)
+        return e_ident
+
+    def unpack(self, data):
+        magic, self.ei_class_2, self.ei_data, self.ei_version, self.ei_osabi, \
+            self.ei_abiversion, pad, self.ei_nident_SIZE = self.LAYOUT.unpack_from(data, 0)
+        self.file_identification = [magic[i:i + 1].decode(encoding='utf-8') for i in range(4)]
+        self.ei_pad = list(pad)
 
     def read_e_ident(self, file: TextIOWrapper):
-        self.read_magic(file)
-        self.read_class(file)
-        self.read_data(file)
-        self.read_version(file)
-        self.read_osabi(file)
-        self.read_abiversion(file)
-        self.read_pad(file)
-        self.read_nident_SIZE(file)
-
-    def read_magic(self, file: TextIOWrapper):
-        self.file_identification = []
-        for i in range(4):
-            self.file_identification.append(
-                file.read(1).decode(encoding='utf-8'))
-        print("read Magic = " + str(self.file_identification))
-
-    def read_class(self, file: TextIOWrapper):
-        self.ei_class_2 = struct.unpack('B', file.read(1))[0]
-        print("read Class = " + str(self.ei_class_2))
-
-    def read_data(self, file: TextIOWrapper):
-        self.ei_data = struct.unpack('B', file.read(1))[0]
-        print("read Data = " + str(self.ei_data))
-
-    def read_version(self, file: TextIOWrapper):
-        self.ei_version = struct.unpack('B', file.read(1))[0]
-        print("read Version = " + str(self.ei_version))
-
-    def read_osabi(self, file: TextIOWrapper):
-        self.ei_osabi = struct.unpack('B', file.read(1))[0]
-        print("read OS/ABI = " + str(self.ei_osabi))
-
-    def read_abiversion(self, file: TextIOWrapper):
-        self.ei_abiversion = struct.unpack('B', file.read(1))[0]
-        print("read ABI VERSION = " + str(self.ei_abiversion))
-
-    def read_pad(self, file: TextIOWrapper):
-        self.ei_pad = []
-        for i in range(6):
-            self.ei_pad.append(struct.unpack('B', file.read(1))[0])
-        print("read pad = " + str(self.ei_pad))
-
-    def read_nident_SIZE(self, file: TextIOWrapper):
-        self.ei_nident_SIZE = struct.unpack('B', file.read(1))[0]
-        print("read nident SIZE = " + str(self.ei_nident_SIZE))
-
-
-class Elf_Ehdr(metaclass=abc.ABCMeta):
+        self.unpack(file.read(self.LAYOUT.size))
+
+
+class Elf_Record(object):
+    '''
+    定长结构体的基类: 子类用 record_layout 声明 FIELDS(字段名, 与文件中的排列顺序一致) 和
+    LAYOUT(预编译的 struct.Struct), 由一次 unpack 得到的元组构造。
+    对象使用 __slots__, 没有 __dict__; FIELDS 中的字段构造后只读, EXTRAS(解析后才补充的属性, 如节名)可写
+    声明了 LAYOUT 的类同时生成大端版本的子类 BIG_ENDIAN(同名, LAYOUT 为 '>'), 解析时按 ei_data 整张表选择一次
+    '''
+    __slots__ = ()
+    FIELDS = ()
+    EXTRAS = ()
+    LAYOUT: struct.Struct = None
+    BIG_ENDIAN: type = None
+
+    def __init_subclass__(cls, **kwargs):
+        '''
+        为每个声明了 FIELDS/EXTRAS 的类生成展开的 __init__(与 namedtuple 的做法相同), 构造时不走循环;
+        各字段直接通过 __slots__ 的成员描述符赋值, 不经过只读检查的 __setattr__, 也不按名字查找
+        '''
+        super().__init_subclass__(**kwargs)
+        if 'FIELDS' not in cls.__dict__ and 'EXTRAS' not in cls.__dict__:
+            return
+        lines = ['def __init__(self, values=None):',
+                 '    if values is None:',
+                 '        values = (None,) * %d' % len(cls.FIELDS)]
+        lines += ['    _set_%s(self, values[%d])' % (name, i) for i, name in enumerate(cls.FIELDS)]
+        lines += ['    _set_%s(self, None)' % name for name in cls.EXTRAS]
+        setters = {'_set_' + name: getattr(cls, name).__set__ for name in cls.FIELDS + cls.EXTRAS}
+        namespace = {}
+        exec('\n'.join(lines), setters, namespace)
+        cls.__init__ = namespace['__init__']
+        if cls.__dict__.get('LAYOUT') is not None:
+            cls.BIG_ENDIAN = type(cls.__name__, (cls,), {     # qualname 可由 pickle 找到
+                '__slots__': (), '__module__': cls.__module__, '__qualname__': cls.__qualname__ + '.BIG_ENDIAN',
+                'LAYOUT': struct.Struct('>' + cls.LAYOUT.format[1:])})
+
+    @classmethod
+    def for_data(cls, ei_data: int) -> type:
+        '''
+        按 e_ident 的 ei_data 选择字节序: 2(ELFDATA2MSB) 为大端, 其余按小端
+        '''
+        return cls.BIG_ENDIAN if ei_data == 2 else cls
+
+    def __setattr__(self, name: str, value: object):
+        if name in self.FIELDS:
+            raise AttributeError("%s.%s 是只读字段" % (type(self).__name__, name))
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS + self.EXTRAS}
+
+    def __setstate__(self, state: dict):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def __repr__(self) -> str:
+        return '%s(%s)' % (type(self).__name__, ', '.join('%s=%r' % (name, getattr(self, name)) for name in self.FIELDS))
+
+    @classmethod
+    def unpack_table(cls, data, offset: int, num: int, entsize: int) -> list:
+        layout = cls.LAYOUT
+        if entsize == layout.size and offset == 0 and len(data) == num * entsize:
+            rows = layout.iter_unpack(data)
+        else:
+            unpack_from = layout.unpack_from
+            rows = (unpack_from(data, offset + i * entsize) for i in range(num))
+        return list(map(cls, rows))
+
+    @classmethod
+    def read_table(cls, file: TextIOWrapper, offset: int, num: int, entsize: int) -> list:
+        if num <= 0:
+            return []
+        file.seek(offset)
+        size = (num - 1) * entsize + cls.LAYOUT.size
+        data = file.read(size)
+        if len(data) < size:
+            raise Exception("%s 表越界: offset=0x%x num=%d" % (cls.__name__, offset, num))
+        return cls.unpack_table(data, 0, num, entsize)
+
+    @classmethod
+    def read(cls, file: TextIOWrapper) -> object:
+        '''
+        从文件当前位置读取一项
+        '''
+        record = cls(cls.LAYOUT.unpack(file.read(cls.LAYOUT.size)))
+        tracer = elflog.get_tracer()
+        if tracer is not None:
+            tracer.record(record)
+        return record
+
+    def read_record(self, file: TextIOWrapper):
+        '''
+        兼容旧的逐字段读取接口(read_Phdr 等): 从文件当前位置读取一项, 覆盖当前对象的字段
+        '''
+        record = self.read(file)
+        for name in self.FIELDS:
+            object.__setattr__(self, name, getattr(record, name))
+
+
+class Elf_Ehdr(Elf_Record):
     '''
     ELF头
     '''
-
-    def __init__(self):
-        self.e_ident:Elf_e_ident = None       # Magic number and other info
-        self.e_type = None        # 表示ELF的文件类型，ET_REL(1)为可重定位文件，一般是.o文件；ET_EXEC(2)为可执行文件；ET_DYN(3)一般为.so文件; ET_CORE(4) 为core file，也就是core dump 产生的文件
-        self.e_machine = None     # 常量定义也在elf.h中，数量得有点多，其中EM_x86_64 为62
-        self.e_version = None     # 意义和上面的Version一致
-        self.e_entry = None       # 表示程序执行的入口地址
-        self.e_phoff = None       # 表示Program Header的入口偏移量
-        self.e_shoff = None       # 表示Section Header的入口偏移量
-        self.e_flags = None       # 表示ELF文件相关的特定处理器的flag
-        self.e_ehsize = None      # 表示ELF Header大小, 当前header的大小就是64 字节
-        self.e_phentsize = None   # 表示Program Header的大小
-        self.e_phnum = None       # 表示Program Header的个数
-        self.e_shentsize = None   # 表示Section Header的大小
-        self.e_shnum = None       # 表示Section Header的个数
-        self.e_shtrndx = None     # 段表字符串表所在段在段表中的下标
-
+    FIELDS = ('e_type',         # 表示ELF的文件类型，ET_REL(1)为可重定位文件，一般是.o文件；ET_EXEC(2)为可执行文件；ET_DYN(3)一般为.so文件; ET_CORE(4) 为core file，也就是core dump 产生的文件
+              'e_machine',      # 常量定义也在elf.h中，数量得有点多，其中EM_x86_64 为62
+              'e_version',      # 意义和上面的Version一致
+              'e_entry',        # 表示程序执行的入口地址
+              'e_phoff',        # 表示Program Header的入口偏移量
+              'e_shoff',        # 表示Section Header的入口偏移量
+              'e_flags',        # 表示ELF文件相关的特定处理器的flag
+              'e_ehsize',       # 表示ELF Header大小, 当前header的大小就是64 字节
+              'e_phentsize',    # 表示Program Header的大小
+              'e_phnum',        # 表示Program Header的个数
+              'e_shentsize',    # 表示Section Header的大小
+              'e_shnum',        # 表示Section Header的个数
+              'e_shtrndx')      # 段表字符串表所在段在段表中的下标
+    EXTRAS = ('e_ident',)       # Magic number and other info
+    __slots__ = FIELDS + EXTRAS
 
     def read_Ehdr(self, file: TextIOWrapper, e_ident: object):
         self.read_e_ident(e_ident)
-        self.read_e_type(file)
-        self.read_e_machine(file)
-        self.read_e_version(file)
-        self.read_e_entry(file)
-        self.read_e_phoff(file)
-        self.read_e_shoff(file)
-        self.read_e_flags(file)
-        self.read_e_ehsize(file)
-        self.read_e_phentsize(file)
-        self.read_e_phnum(file)
-        self.read_e_shentsize(file)
-        self.read_e_shnum(file)
-        self.read_e_shtrndx(file)
-
+        self.read_record(file)
 
     def read_e_ident(self, e_ident: object):
         self.e_ident = e_ident
 
-    def read_e_type(self, file: TextIOWrapper):
-        self.e_type = struct.unpack('H', file.read(2))[0]
-        print("read e_type = " + str(self.e_type))
-
-    def read_e_machine(self, file: TextIOWrapper):
-        self.e_machine = struct.unpack('H', file.read(2))[0]
-        print("read e_machine = " + str(self.e_machine))
 
-    def read_e_version(self, file: TextIOWrapper):
-        self.e_version = struct.unpack('I', file.read(4))[0]
-        print("read e_version = " + str(self.e_version))
-
-    @abc.abstractmethod
-    def read_e_entry(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_e_phoff(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_e_shoff(self, file: TextIOWrapper):
-        pass
-
-    def read_e_flags(self, file: TextIOWrapper):
-        self.e_flags = struct.unpack('I', file.read(4))[0]
-        print("read e_flags = %d" % (self.e_flags))
-
-    def read_e_ehsize(self, file: TextIOWrapper):
-        self.e_ehsize = struct.unpack('H', file.read(2))[0]
-        print("read e_ehsize = %d" % (self.e_ehsize))
-
-    def read_e_phentsize(self, file: TextIOWrapper):
-        self.e_phentsize = struct.unpack('H', file.read(2))[0]
-        print("read e_phentsize = %d" % (self.e_phentsize))
-
-    def read_e_phnum(self, file: TextIOWrapper):
-        self.e_phnum = struct.unpack('H', file.read(2))[0]
-        print("read e_phnum = %d" % (self.e_phnum))
-
-    def read_e_shentsize(self, file: TextIOWrapper):
-        self.e_shentsize = struct.unpack('H', file.read(2))[0]
-        print("read e_shentsize = %d" % (self.e_shentsize))
-
-    def read_e_shnum(self, file: TextIOWrapper):
-        self.e_shnum = struct.unpack('H', file.read(2))[0]
-        print("read e_shnum = %d" % (self.e_shnum))
-
-    def read_e_shtrndx(self, file: TextIOWrapper):
-        self.e_shtrndx = struct.unpack('H', file.read(2))[0]
-        print("read e_shtrndx = %d" % (self.e_shtrndx))
-
-
-class Elf_Phdr(metaclass=abc.ABCMeta):
+class Elf_Phdr(Elf_Record):
     '''
-    段表
+    段表, 32位与64位的排列顺序不同, 见各自的 FIELDS
     '''
-    def __init__(self):
-        self.p_type = None    # 段类型
-        self.p_flags = None   # 段标志
-        self.p_offset = None  # 段所在的文件偏移量，单位为字节
-        self.p_vaddr = None   # 段起始的虚拟地址
-        self.p_paddr = None   # 段开始的物理地址(特定于操作系统)
-        self.p_filesz = None  # 文件映像的字节数(可能为零)
-        self.p_memsz = None   # 内存映像中的字节数(可能为零)
-        self.p_align = None   # 段对齐约束
-
-
-    @abc.abstractmethod
-    def read_Phdr(self, file: TextIOWrapper): # 32位与64位的排列顺序不同
-        pass
-
-    def read_p_type(self, file: TextIOWrapper):
-        self.p_type = struct.unpack('I', file.read(4))[0]
-        print("read p_type = %d" % (self.p_type))
-
-    def read_p_flags(self, file: TextIOWrapper):
-        self.p_flags = struct.unpack('I', file.read(4))[0]
-        print("read p_flags = %d" % (self.p_flags))
-
-    @abc.abstractmethod
-    def read_p_offset(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_p_vaddr(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_p_paddr(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_p_filesz(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_p_memsz(self, file: TextIOWrapper):
-        pass
+    __slots__ = ('p_type',    # 段类型
+                 'p_flags',   # 段标志
+                 'p_offset',  # 段所在的文件偏移量，单位为字节
+                 'p_vaddr',   # 段起始的虚拟地址
+                 'p_paddr',   # 段开始的物理地址(特定于操作系统)
+                 'p_filesz',  # 文件映像的字节数(可能为零)
+                 'p_memsz',   # 内存映像中的字节数(可能为零)
+                 'p_align')   # 段对齐约束
+
+    def read_Phdr(self, file: TextIOWrapper):
+        self.read_record(file)
+
+
+class Elf_Shdr(Elf_Record):
+    FIELDS = ('sh_name',        # 节区名称,此处是一个在名称节区的地址偏移（字符串的起点偏移）
+              'sh_type',        # 节区类型，决定节表的作用
+              'sh_flags',       # 同Program Header的p_flags，表示读写执行权限
+              'sh_addr',        # 节区索引地址
+              'sh_offset',      # 节区相对于文件的偏移地址  //修改rodata的此值，能让IDA的字符串乱掉
+              'sh_size',        # 节区的大小
+              'sh_link',        # 此成员给出节区头部表索引链接
+              'sh_info',        # 此成员给出附加信息
+              'sh_addralign',   # 某些节区带有地址对齐约束。例如,如果一个节区保存一个doubleword,那么系统必须保证整个节区能够按双字对齐。sh_addr 对sh_addralign 取模,结果必须为 0。目前仅允许取值为 0 和 2的幂次数。数值 0 和 1 表示节区没有对齐约束。
+              'sh_entsize')     # 某些节区中包含固定大小的项目,如符号表。对于这类节区,此成员给出每个表项的长度字节数。 如果节区中并不包含固定长度表项的表格,此成员取值为 0
+    EXTRAS = ('section_name',)
+    __slots__ = FIELDS + EXTRAS
+
+    def read_Shdr(self, file: TextIOWrapper):
+        self.read_record(file)
+
+    def read_section_name(self, shstrtabs: StringTable):
+        self.section_name = shstrtabs.get(self.sh_name)
+
+
+class Elf_Sym(Elf_Record):
+    '''
+    符号表项, 32位与64位的排列顺序不同, 见各自的 FIELDS
+    '''
+    EXTRAS = ('sym_name',)
+    __slots__ = ('st_name',     # 符号名字在字符串表中的偏移
+                 'st_value',    # 符号相应的值，可能是地址或一个绝对值数
+                 'st_size',     # 符号大小
+                 'st_info',     # 符号类型和绑定值
+                 'st_other',    # 默认0
+                 'st_shndx',    # 符号所在的段
+                 'sym_name')
 
-    @abc.abstractmethod
-    def read_p_align(self, file: TextIOWrapper):
-        pass
+    def read_Sym(self, file: TextIOWrapper):
+        self.read_record(file)
 
+    def read_sym_name(self, strtabs: StringTable):
+        self.sym_name = strtabs.get(self.st_name)
 
+    @property
+    def section_name(self) -> str:     # 旧版本把符号名写在 section_name 中, 保留为别名
+        return self.sym_name
 
-class Elf_Shdr(metaclass=abc.ABCMeta):
+    @section_name.setter
+    def section_name(self, name: str):
+        self.sym_name = name
 
-    def __init__(self):
-        self.sh_name = None     # 节区名称,此处是一个在名称节区的地址偏移（字符串的起点偏移）
-        self.section_name = None
-        self.sh_type = None     # 节区类型，决定节表的作用
-        self.sh_flags = None    # 同Program Header的p_flags，表示读写执行权限
-        self.sh_addr = None     # 节区索引地址
-        self.sh_offset = None   # 节区相对于文件的偏移地址  //修改rodata的此值，能让IDA的字符串乱掉
-        self.sh_size = None     # 节区的大小
-        self.sh_link = None     # 此成员给出节区头部表索引链接
-        self.sh_info = None     # 此成员给出附加信息
-        self.sh_addralign = None# 某些节区带有地址对齐约束。例如,如果一个节区保存一个doubleword,那么系统必须保证整个节区能够按双字对齐。sh_addr 对sh_addralign 取模,结果必须为 0。目前仅允许取值为 0 和 2的幂次数。数值 0 和 1 表示节区没有对齐约束。
-        self.sh_entsize = None  # 某些节区中包含固定大小的项目,如符号表。对于这类节区,此成员给出每个表项的长度字节数。 如果节区中并不包含固定长度表项的表格,此成员取值为 0
-        
-
-    def read_Shdr(self, file: TextIOWrapper): 
-        self.read_sh_name(file)
-        self.read_sh_type(file)
-        self.read_sh_flags(file)
-        self.read_sh_addr(file)
-        self.read_sh_offset(file)
-        self.read_sh_size(file)
-        self.read_sh_link(file)
-        self.read_sh_info(file)
-        self.read_sh_addralign(file)
-        self.read_sh_entsize(file)
-
-
-    def read_sh_name(self, file: TextIOWrapper):
-        self.sh_name = struct.unpack('I', file.read(4))[0]
-        print("read sh_name = %d" % (self.sh_name))
-
-    def read_section_name(self, shstrtabs: str):
-        idx = shstrtabs.find('\0', self.sh_name)
-        self.section_name = shstrtabs[self.sh_name:idx]
-        print("read section_name = %s\n" % (self.section_name))
-
-    def read_sh_type(self, file: TextIOWrapper):
-        self.sh_type = struct.unpack('I', file.read(4))[0]
-        print("read sh_type = %d" % (self.sh_type))
-
-    @abc.abstractmethod
-    def read_sh_flags(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_sh_addr(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_sh_offset(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_sh_size(self, file: TextIOWrapper):
-        pass
-
-    def read_sh_link(self, file: TextIOWrapper):
-        self.sh_link = struct.unpack('I', file.read(4))[0]
-        print("read sh_link = %d" % (self.sh_link))
-
-    def read_sh_info(self, file: TextIOWrapper):
-        self.sh_info = struct.unpack('I', file.read(4))[0]
-        print("read sh_info = %d" % (self.sh_info))
-
-    @abc.abstractmethod
-    def read_sh_addralign(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_sh_entsize(self, file: TextIOWrapper):
-        pass
-
-
-class Elf_Sym(metaclass=abc.ABCMeta):
 
-    def __init__(self):
-        self.st_name = None     # 符号名字在字符串表中的偏移
-        self.st_value = None    # 符号相应的值，可能是地址或一个绝对值数
-        self.st_size = None     # 符号大小
-        self.st_info = None     # 符号类型和绑定值
-        self.st_other = None    # 默认0
-        self.st_shndx = None    # 符号所在的段
-        self.sym_name = None
-   
-    @abc.abstractmethod
-    def read_Sym(self, file: TextIOWrapper): 
-        pass
-
-    def read_sym_name(self, strtabs:str):
-        idx = strtabs.find('\0', self.st_name)
-        self.section_name = strtabs[self.st_name:idx]
-        print("read sym_name = %s\n" % (self.section_name))
-
-    def read_st_name(self, file: TextIOWrapper):
-        self.st_name = struct.unpack('I', file.read(4))[0]
-        print("read st_name = %x" % (self.st_name))
-
-    @abc.abstractmethod
-    def read_st_value(self, file: TextIOWrapper):
-        pass
-
-    @abc.abstractmethod
-    def read_st_size(self, file: TextIOWrapper):
-        pass
-
-
-    def read_st_info(self, file: TextIOWrapper):
-        self.st_info = struct.unpack('B', file.read(1))[0]
-        print("read st_info = " + str(self.st_info))
-
-    def read_st_other(self, file: TextIOWrapper):
-        self.st_other = struct.unpack('B', file.read(1))[0]
-        print("read st_other = " + str(self.st_other))
-
-    def read_st_shndx(self, file: TextIOWrapper):
-        self.st_shndx = struct.unpack('H', file.read(2))[0]
-        print("read st_shndx = " + str(self.st_shndx))
-
-
-class Elf_Dym(metaclass=abc.ABCMeta):
+class Elf_Dym(Elf_Record):
     '''
     动态 .dynamic 节
     '''
@@ -381,7 +284,17 @@ class Elf_Dym(metaclass=abc.ABCMeta):
         "DT_ENCODING":32,
         "DT_PREINIT_ARRAY":32,
         "DT_PREINIT_ARRAYSZ":33,
+        "DT_RELRSZ":35,
+        "DT_RELR":36,       #紧凑的相对重定位表, 只记录地址
+        "DT_RELRENT":37,
         "DT_LOOS":0x60000000,
+        "DT_ANDROID_REL":0x6000000F,    #安卓 APS2 压缩的重定位表
+        "DT_ANDROID_RELSZ":0x60000010,
+        "DT_ANDROID_RELA":0x60000011,
+        "DT_ANDROID_RELASZ":0x60000012,
+        "DT_ANDROID_RELR":0x6FFFE000,   #DT_RELR 标准化之前安卓使用的编号
+        "DT_ANDROID_RELRSZ":0x6FFFE001,
+        "DT_ANDROID_RELRENT":0x6FFFE003,
         "DT_HIOS":0x6FFFFFFF,
         "DT_LOPROC":0x70000000,
         "DT_HIPROC":0x7FFFFFFF,
@@ -444,21 +357,76 @@ class Elf_Dym(metaclass=abc.ABCMeta):
         "DT_MIPS_RLD_MAP_REL":0x70000035,
         "DT_AUXILIARY":0x7FFFFFFD,
         "DT_FILTER":0x7FFFFFFF}
+    FIELDS = ('d_tag',    # 节的类型
+              'd_un')     # 由d_tag决定此字段如何解析，可为地址（d_ptr）或者为值（d_val）
+    __slots__ = FIELDS
+
+    def read_Dym(self, file: TextIOWrapper):
+        self.read_record(file)
 
-    def __init__(self):
-        self.d_tag = None    # 节的类型
-        self.d_un = None     # 由d_tag决定此字段如何解析，可为地址（d_ptr）或者为值（d_val）
 
-    def read_Dym(self, file: TextIOWrapper): 
-        self.read_d_tag(file)
-        self.read_d_un(file)
+class Elf_Rel(Elf_Record):
+    '''
+    重定位表项(.rel.dyn/.rel.plt), 没有显式加数, 加数保存在被修改的位置
+    '''
+    INFO_SHIFT = 0
+    FIELDS = ('r_offset',   # 需要修改的位置, 共享库中为虚拟地址
+              'r_info')     # 符号下标和重定位类型, 32位为 sym << 8 | type, 64位为 sym << 32 | type
+    __slots__ = FIELDS
+
+    @property
+    def r_sym(self) -> int:
+        return self.r_info >> self.INFO_SHIFT
+
+    @property
+    def r_type(self) -> int:
+        return self.r_info & ((1 << self.INFO_SHIFT) - 1)
+
+
+class Elf_Rela(Elf_Rel):
+    '''
+    带显式加数的重定位表项(.rela.dyn/.rela.plt)
+    '''
+    FIELDS = ('r_offset', 'r_info', 'r_addend')
+    __slots__ = ('r_addend',)
+
 
-    @abc.abstractmethod
-    def read_d_tag(self, file: TextIOWrapper):
-        pass
+class Elf_Verdef(Elf_Record):
+    '''
+    .gnu.version_d 的版本定义项, 32 位与 64 位布局相同; 名字在 vd_aux 指向的 Elf_Verdaux 链中, 第一项为版本本身, 其后为父版本
+    '''
+    FIELDS, LAYOUT = record_layout(('vd_version', 'H'),     # 结构版本, 固定为 1
+                                   ('vd_flags', 'H'),       # VER_FLG_BASE(1): 文件本身(soname), VER_FLG_WEAK(2)
+                                   ('vd_ndx', 'H'),         # 版本下标, 即 .gnu.version 中引用它的值
+                                   ('vd_cnt', 'H'),         # Elf_Verdaux 的个数
+                                   ('vd_hash', 'I'),        # 版本名的 ELF 哈希
+                                   ('vd_aux', 'I'),         # 第一个 Elf_Verdaux 相对本项的偏移
+                                   ('vd_next', 'I'))        # 下一个 Elf_Verdef 相对本项的偏移, 0 为结束
+    __slots__ = FIELDS
 
-    @abc.abstractmethod
-    def read_d_un(self, file: TextIOWrapper):
-        pass
 
+class Elf_Verdaux(Elf_Record):
+    FIELDS, LAYOUT = record_layout(('vda_name', 'I'),       # 版本名在 .dynstr 中的偏移
+                                   ('vda_next', 'I'))       # 下一个 Elf_Verdaux 相对本项的偏移
+    __slots__ = FIELDS
 
+
+class Elf_Verneed(Elf_Record):
+    '''
+    .gnu.version_r 的版本需求项, 每个依赖的文件一项, 其需要的各个版本在 vn_aux 指向的 Elf_Vernaux 链中
+    '''
+    FIELDS, LAYOUT = record_layout(('vn_version', 'H'),     # 结构版本, 固定为 1
+                                   ('vn_cnt', 'H'),         # Elf_Vernaux 的个数
+                                   ('vn_file', 'I'),        # 依赖的文件名(DT_NEEDED)在 .dynstr 中的偏移
+                                   ('vn_aux', 'I'),         # 第一个 Elf_Vernaux 相对本项的偏移
+                                   ('vn_next', 'I'))        # 下一个 Elf_Verneed 相对本项的偏移, 0 为结束
+    __slots__ = FIELDS
+
+
+class Elf_Vernaux(Elf_Record):
+    FIELDS, LAYOUT = record_layout(('vna_hash', 'I'),       # 版本名的 ELF 哈希
+                                   ('vna_flags', 'H'),      # VER_FLG_WEAK(2)
+                                   ('vna_other', 'H'),      # 版本下标, 即 .gnu.version 中引用它的值
+                                   ('vna_name', 'I'),       # 版本名在 .dynstr 中的偏移
+                                   ('vna_next', 'I'))       # 下一个 Elf_Vernaux 相对本项的偏移
+    __slots__ = FIELDS
@@ -0,0 +1,154 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : batch.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import functools
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List
+from elfstats import ParseStats
+from parse import ELF
+
+'''
+批量扫描目录树中的 .so, 用进程池并行解析, 结果按 JSON Lines 输出:
+
+    python batch.py ./lib ./apks/extracted -j 16 -o result.jsonl
+
+- 每个文件一行 JSON, 解析失败的文件输出 error 字段, 不影响其他文件
+- --max-tasks-per-child 定期回收 worker, --memory-limit 限制单个 worker 的地址空间(MB)
+- --no-sections 按动态链接器的方式只通过程序头解析, 用于节头被抹掉或篡改的 so
+- --stats 在每行结果中附带分阶段统计(耗时、read/seek 次数、字节数、对象数), 见 elfstats.py
+- 结束时在 stderr 输出文件数和 files/s
+'''
+
+
+def walk(paths: List[str], pattern: str = '*.so') -> Iterator[str]:
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if fnmatch.fnmatch(name, pattern):
+                    yield os.path.join(root, name)
+
+
+@contextlib.contextmanager
+def capture(result: dict) -> Iterator[dict]:
+    '''
+    ELF 解析出错时会 print, 代码块中的输出收集到 result['messages'], 不污染 stdout;
+    代码块抛出的异常记录到 result['error'], 不向外抛出
+    '''
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            yield result
+    except Exception as err:
+        result['error'] = str(err) or type(err).__name__
+    if output.getvalue():
+        result['messages'] = output.getvalue().splitlines()
+
+
+def scan_file(path: str, use_sections: bool = True, stats: bool = False) -> dict:
+    '''
+    解析一个文件并返回摘要; 任何异常都记录到结果中, 不向外抛出
+    '''
+    result = {'path': path}
+    stats = ParseStats() if stats else None
+    with capture(result), ELF(path, use_mmap=True, use_sections=use_sections, stats=stats) as elf:
+        if not elf.is_valid():
+            raise Exception("不是有效的 ELF 文件")
+        ehdr = elf.elf_header.elf_ehdr
+        result.update({
+            'class': ehdr.e_ident.ei_class_2,
+            'data': ehdr.e_ident.ei_data,
+            'e_type': ehdr.e_type,
+            'e_machine': ehdr.e_machine,
+            'e_entry': ehdr.e_entry,
+            'phnum': len(elf.program_header_table),
+            'shnum': len(elf.section_header_table),
+            'symbols': len(elf.symbol_table),
+            'dynamic': len(elf.dynamic_table),
+        })
+    if stats is not None:
+        result['stats'] = stats.as_dict()
+    return result
+
+
+def init_worker(memory_limit: int):
+    if memory_limit:
+        try:
+            import resource
+        except ImportError:     # 非 POSIX 平台不支持, 忽略
+            return
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def worker_pool(jobs: int = None, max_tasks_per_child: int = None, memory_limit: int = 0) -> ProcessPoolExecutor:
+    '''
+    批量工具共用的进程池: max_tasks_per_child 个任务后重启 worker, memory_limit(MB) 限制单个 worker 的地址空间
+    '''
+    kwargs = {'max_workers': jobs, 'initializer': init_worker, 'initargs': (memory_limit,)}
+    if max_tasks_per_child:
+        kwargs['max_tasks_per_child'] = max_tasks_per_child
+    return ProcessPoolExecutor(**kwargs)
+
+
+def scan(paths: List[str], output=None, jobs: int = None, chunksize: int = 16, pattern: str = '*.so',
+         max_tasks_per_child: int = None, memory_limit: int = 0, use_sections: bool = True, stats: bool = False) -> dict:
+    '''
+    并行扫描并把结果逐行写入 output, 返回统计信息
+    '''
+    output = output or sys.stdout
+    start = time.perf_counter()
+    count = errors = 0
+    with worker_pool(jobs, max_tasks_per_child, memory_limit) as executor:
+        for result in executor.map(functools.partial(scan_file, use_sections=use_sections, stats=stats), walk(paths, pattern),
+                                   chunksize=chunksize):
+            output.write(json.dumps(result) + '\n')
+            count += 1
+            errors += 'error' in result
+    elapsed = time.perf_counter() - start
+    return {'files': count, 'errors': errors, 'seconds': elapsed, 'files_per_sec': count / elapsed if elapsed else 0.0}
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='批量解析目录树中的 ELF 文件, 输出 JSON Lines')
+    parser.add_argument('paths', nargs='+', help='目录或文件')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='进程数, 默认为 CPU 核数')
+    parser.add_argument('-c', '--chunksize', type=int, default=16, help='每次分发给 worker 的文件数')
+    parser.add_argument('-o', '--output', default=None, help='输出文件, 默认 stdout')
+    parser.add_argument('-p', '--pattern', default='*.so', help='文件名匹配模式')
+    parser.add_argument('--max-tasks-per-child', type=int, default=None, help='worker 处理多少个任务后重启')
+    parser.add_argument('--memory-limit', type=int, default=0, help='单个 worker 的内存上限(MB)')
+    parser.add_argument('--no-sections', action='store_true', help='不读取节头, 只通过程序头和 .dynamic 解析')
+    parser.add_argument('--stats', action='store_true', help='每行结果附带分阶段统计')
+    args = parser.parse_args(argv)
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        stats = scan(args.paths, output, args.jobs, args.chunksize, args.pattern,
+                     args.max_tasks_per_child, args.memory_limit, not args.no_sections, args.stats)
+    finally:
+        if args.output:
+            output.close()
+    print("scanned %d files (%d errors) in %.2fs, %.1f files/s"
+          % (stats['files'], stats['errors'], stats['seconds'], stats['files_per_sec']), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
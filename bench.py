@@ -0,0 +1,530 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : bench.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+import elflog
+from base import Elf_Dym
+from elf32 import Elf32_Ehdr, Elf32_Phdr, Elf32_Shdr, Elf32_Sym, Elf32_Dym
+from elf64 import Elf64_Ehdr, Elf64_Phdr, Elf64_Shdr, Elf64_Sym, Elf64_Dym
+from hashtab import elf_hash
+from parse import ELF
+from symtab import SymbolTable
+
+'''
+解析性能基准: 在本地生成规模可控的 32/64 位 ELF, 逐阶段计时并记录峰值内存, 结果为 JSON, 用于跨提交比较:
+
+    python bench.py -o base.json                                  # 默认 64 位和 32 位各一个文件
+    python bench.py --bits 64 --sections 2000 --symbols 200000 --dynamic 500 -r 10 -o new.json
+    python bench.py --compare base.json -o new.json               # 最小耗时变慢超过 --threshold 时退出码为 1
+    python bench.py --files arm64-v8a/libnative-lib.so            # 同时测量真实文件
+    python bench.py --byte-order little big                       # 同时测量大端文件(32 位为 MIPS, 64 位为 PPC64)
+    python bench.py --compare-unpack -r 20                        # 在自带的 so 上对比逐字段解码与整表 iter_unpack
+    python bench.py --symbol-memory --symbols 100000              # SymbolTable 与 Elf_Sym 列表每个符号占用的内存
+    python bench.py --tracer silent text json -r 20               # tracer 关闭和输出文本/JSON(到 os.devnull)时的 read_elf 耗时
+
+- 每个阶段对应 ELF 的一个惰性属性(即一个 read_*/get_* 方法), 计时前先在同一个 ELF 上解析完它依赖的表, 只计该阶段本身;
+  symbol_table 属性依次读取 .symtab 和 .dynsym, 这里拆成两个阶段分别计时
+- 每次重复都使用新的 ELF 对象, 分别在 read(普通文件读取) 和 mmap 两种模式下测量
+- 峰值内存由 tracemalloc 单独测一次(开启后解析会变慢, 不与计时混在一起), 为该阶段新分配内存的峰值
+- 生成的文件: PT_LOAD(vaddr 与文件偏移相同) + PT_DYNAMIC; .dynstr/.dynsym/.hash/.dynamic/.strtab/.symtab/.shstrtab
+  和 N 个 .text.N 节; 每 4 个符号中有 1 个未定义, .dynamic 中除必需项外都是 DT_NEEDED
+'''
+
+# (阶段名, 依赖的属性, 计时的属性或 func(elf))
+STAGES = (
+    ('read_elf_header', (), 'elf_header'),
+    ('read_program_header_table', ('elf_header',), 'program_header_table'),
+    ('get_shstrtab', ('elf_header',), 'shstrtabs'),
+    ('read_section_header_table', ('shstrtabs',), 'section_header_table'),
+    ('get_strtab', ('section_header_table',), 'strtabs'),
+    ('get_dynstr', ('section_header_table',), 'dynstrs'),
+    ('read_dynamic_table', ('section_header_table',), 'dynamic_table'),
+    ('read_symbol_table', ('strtabs',), lambda elf: load_symbols(elf, 'read_symbol_table')),
+    ('read_dynamic_symbol_table', ('dynstrs',), lambda elf: load_symbols(elf, 'read_dynamic_symbol_table')),
+    ('read_elf', (), None),
+)
+MODES = (('read', False), ('mmap', True))
+EM_MIPS = 8
+EM_ARM = 40
+EM_PPC64 = 21
+EM_AARCH64 = 183
+SHT_PROGBITS, SHT_SYMTAB, SHT_STRTAB, SHT_HASH, SHT_DYNAMIC, SHT_DYNSYM = 1, 2, 3, 5, 6, 11
+SHF_WRITE, SHF_ALLOC, SHF_EXECINSTR = 1, 2, 4
+
+
+class StringTableBuilder(object):
+    '''
+    生成字符串表, 第一个字节为 \\0, add 返回名字的偏移
+    '''
+    def __init__(self):
+        super(StringTableBuilder, self).__init__()
+        self.data = bytearray(b'\0')
+
+    def add(self, name: str) -> int:
+        offset = len(self.data)
+        self.data += name.encode('utf-8') + b'\0'
+        return offset
+
+
+def align(data: bytearray, alignment: int = 8):
+    data += bytes(-len(data) % alignment)
+
+
+def sysv_hash_table(names: List[bytes], byteorder: str = 'little') -> bytes:
+    '''
+    DT_HASH 表: nbucket, nchain, bucket[], chain[], 下标 0 为空符号
+    '''
+    nchain = len(names)
+    nbucket = max(1, nchain // 2)
+    buckets = [0] * nbucket
+    chains = [0] * nchain
+    for index in range(1, nchain):
+        bucket = elf_hash(names[index]) % nbucket
+        chains[index] = buckets[bucket]
+        buckets[bucket] = index
+    return b''.join(value.to_bytes(4, byteorder) for value in [nbucket, nchain] + buckets + chains)
+
+
+def make_elf(bits: int = 64, sections: int = 100, symbols: int = 10000, dynamic: int = 100,
+             big_endian: bool = False) -> bytes:
+    '''
+    生成一个结构合法的共享库: sections 个 .text.N 节, symbols 个符号(.dynsym 与 .symtab 各一份), dynamic 项 .dynamic
+    '''
+    ei_data = 2 if big_endian else 1
+    ehdr_class, phdr_class, shdr_class, sym_class, dym_class = (cls.for_data(ei_data) for cls in (
+        (Elf32_Ehdr, Elf32_Phdr, Elf32_Shdr, Elf32_Sym, Elf32_Dym) if bits == 32 else
+        (Elf64_Ehdr, Elf64_Phdr, Elf64_Shdr, Elf64_Sym, Elf64_Dym)))
+    ehsize = 16 + ehdr_class.LAYOUT.size
+    phnum = 2
+    data = bytearray(ehsize + phnum * phdr_class.LAYOUT.size)
+    align(data)
+    shstrtab = StringTableBuilder()
+    shdrs = [dict()]    # 第 0 项为空节头
+
+    def add_section(name: str, sh_type: int, content: bytes, flags: int = 0, link: int = 0, info: int = 0,
+                    entsize: int = 0, addralign: int = 8) -> int:
+        align(data, addralign)
+        offset = len(data)
+        data.extend(content)
+        shdrs.append({'sh_name': shstrtab.add(name), 'sh_type': sh_type, 'sh_flags': flags,
+                      'sh_addr': offset if flags & SHF_ALLOC else 0, 'sh_offset': offset, 'sh_size': len(content),
+                      'sh_link': link, 'sh_info': info, 'sh_addralign': addralign, 'sh_entsize': entsize})
+        return len(shdrs) - 1
+
+    text_first = 1 + 6      # .text.N 排在 6 个固定节之后, 符号指向它们
+    dynstr = StringTableBuilder()
+    strtab = StringTableBuilder()
+    names = [b'']
+    sym_rows, dynsym_rows = [], []
+    null = dict.fromkeys(sym_class.FIELDS, 0)
+    sym_rows.append(null)
+    dynsym_rows.append(null)
+    for i in range(1, symbols + 1):
+        name = 'bench_symbol_%d' % (i)
+        names.append(name.encode('utf-8'))
+        defined = i % 4 != 0
+        row = {'st_info': (1 << 4) | 2, 'st_other': 0,     # STB_GLOBAL, STT_FUNC
+               'st_shndx': text_first + i % sections if defined and sections else 0,
+               'st_value': 0x1000 + i * 16 if defined else 0, 'st_size': 16 if defined else 0}
+        dynsym_rows.append(dict(row, st_name=dynstr.add(name)))
+        sym_rows.append(dict(row, st_name=strtab.add(name)))
+    fixed = [('DT_SONAME', dynstr.add('libbench.so'))]
+    needed = [('DT_NEEDED', dynstr.add('libdep_%d.so' % (i))) for i in range(max(0, dynamic - 7))]
+
+    def pack(record_class: type, rows: List[dict]) -> bytes:
+        layout, fields = record_class.LAYOUT, record_class.FIELDS
+        return b''.join(layout.pack(*(row[name] for name in fields)) for row in rows)
+
+    dynstr_index = add_section('.dynstr', SHT_STRTAB, bytes(dynstr.data), SHF_ALLOC, addralign=1)
+    dynsym_index = add_section('.dynsym', SHT_DYNSYM, pack(sym_class, dynsym_rows), SHF_ALLOC, dynstr_index, 1,
+                               sym_class.LAYOUT.size)
+    hash_index = add_section('.hash', SHT_HASH, sysv_hash_table(names, 'big' if big_endian else 'little'), SHF_ALLOC, dynsym_index, entsize=4)
+    entries = needed + fixed + [('DT_HASH', shdrs[hash_index]['sh_addr']),
+                                ('DT_STRTAB', shdrs[dynstr_index]['sh_addr']),
+                                ('DT_SYMTAB', shdrs[dynsym_index]['sh_addr']),
+                                ('DT_STRSZ', len(dynstr.data)),
+                                ('DT_SYMENT', sym_class.LAYOUT.size),
+                                ('DT_NULL', 0)]
+    dynamic_data = pack(dym_class, [{'d_tag': Elf_Dym.TAG[tag], 'd_un': value} for tag, value in entries])
+    dynamic_index = add_section('.dynamic', SHT_DYNAMIC, dynamic_data, SHF_ALLOC | SHF_WRITE, dynstr_index,
+                                entsize=dym_class.LAYOUT.size)
+    strtab_index = add_section('.strtab', SHT_STRTAB, bytes(strtab.data), addralign=1)
+    add_section('.symtab', SHT_SYMTAB, pack(sym_class, sym_rows), 0, strtab_index, 1, sym_class.LAYOUT.size)
+    for i in range(sections):
+        add_section('.text.%d' % (i), SHT_PROGBITS, bytes(16), SHF_ALLOC | SHF_EXECINSTR, addralign=16)
+    shstrtab_name = shstrtab.add('.shstrtab')
+    shstrtab_offset = len(data)
+    data.extend(shstrtab.data)
+    shdrs.append({'sh_name': shstrtab_name, 'sh_type': SHT_STRTAB, 'sh_offset': shstrtab_offset,
+                  'sh_size': len(shstrtab.data), 'sh_addralign': 1})
+    align(data)
+    shoff = len(data)
+    data.extend(pack(shdr_class, [dict(dict.fromkeys(shdr_class.FIELDS, 0), **shdr) for shdr in shdrs]))
+
+    load_size = shdrs[dynamic_index]['sh_offset'] + shdrs[dynamic_index]['sh_size']
+    phdrs = [{'p_type': 1, 'p_flags': 5, 'p_offset': 0, 'p_vaddr': 0, 'p_paddr': 0,         # PT_LOAD
+              'p_filesz': load_size, 'p_memsz': load_size, 'p_align': 0x1000},
+             {'p_type': 2, 'p_flags': 6, 'p_offset': shdrs[dynamic_index]['sh_offset'],          # PT_DYNAMIC
+              'p_vaddr': shdrs[dynamic_index]['sh_addr'], 'p_paddr': shdrs[dynamic_index]['sh_addr'],
+              'p_filesz': len(dynamic_data), 'p_memsz': len(dynamic_data), 'p_align': 8}]
+    e_ident = b'\x7fELF' + bytes([1 if bits == 32 else 2, ei_data, 1, 0]) + bytes(8)
+    machine = (EM_MIPS if big_endian else EM_ARM) if bits == 32 else (EM_PPC64 if big_endian else EM_AARCH64)
+    ehdr = ehdr_class.LAYOUT.pack(3, machine, 1, 0,       # ET_DYN
+                                  ehsize, shoff, 0, ehsize, phdr_class.LAYOUT.size, phnum,
+                                  shdr_class.LAYOUT.size, len(shdrs), len(shdrs) - 1)
+    data[:ehsize] = e_ident + ehdr
+    data[ehsize:ehsize + phnum * phdr_class.LAYOUT.size] = pack(phdr_class, phdrs)
+    return bytes(data)
+
+
+def load_symbols(elf: ELF, reader: str):
+    '''
+    只读取 .symtab(read_symbol_table) 或 .dynsym(read_dynamic_symbol_table) 一段
+    '''
+    elf._symbol_table = SymbolTable()
+    elf.load(getattr(elf, reader))
+
+
+def perform(elf: ELF, attribute):
+    if attribute is None:
+        elf.read_elf()
+    elif callable(attribute):
+        attribute(elf)
+    else:
+        getattr(elf, attribute)
+
+
+def run_stage(path: str, use_mmap: bool, prerequisites: tuple, attribute) -> float:
+    '''
+    新建 ELF, 解析依赖的表后只对 attribute 计时, 返回秒数
+    '''
+    with ELF(path, use_mmap=use_mmap) as elf:
+        for name in prerequisites:
+            getattr(elf, name)
+        start = time.perf_counter()
+        perform(elf, attribute)
+        return time.perf_counter() - start
+
+
+def measure_peak(path: str, use_mmap: bool, prerequisites: tuple, attribute) -> int:
+    '''
+    该阶段新分配内存的峰值(字节)
+    '''
+    tracemalloc.start()
+    try:
+        with ELF(path, use_mmap=use_mmap) as elf:
+            for name in prerequisites:
+                getattr(elf, name)
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            perform(elf, attribute)
+            return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def bench_file(path: str, label: str, repeat: int) -> List[dict]:
+    results = []
+    for mode, use_mmap in MODES:
+        for stage, prerequisites, attribute in STAGES:
+            times = [run_stage(path, use_mmap, prerequisites, attribute) for i in range(repeat)]
+            results.append({'file': label, 'mode': mode, 'stage': stage, 'min': min(times),
+                            'median': statistics.median(times), 'mean': statistics.fmean(times),
+                            'peak_bytes': measure_peak(path, use_mmap, prerequisites, attribute)})
+    return results
+
+
+def decode_per_field(file, record_class: type, offset: int, num: int, entsize: int) -> list:
+    '''
+    优化前的解码方式: 逐项 seek, 每个字段一次 file.read 和 struct.unpack
+    '''
+    order = record_class.LAYOUT.format[0]
+    fields = [(struct.calcsize(code), order + code) for code in record_class.LAYOUT.format[1:]]
+    records = []
+    for i in range(num):
+        file.seek(offset + i * entsize)
+        records.append(record_class(tuple(struct.unpack(fmt, file.read(size))[0] for size, fmt in fields)))
+    return records
+
+
+def unpack_tables(elf: ELF) -> List[tuple]:
+    '''
+    [(表名, 结构体类型, 偏移, 表项个数, 表项大小)]: 程序头表、节头表、.dynamic、.dynsym、.symtab 中存在的
+    '''
+    ehdr = elf.elf_header.elf_ehdr
+    decoder = elf.decoder
+    tables = [('phdr', decoder.phdr, ehdr.e_phoff, ehdr.e_phnum, ehdr.e_phentsize),
+              ('shdr', decoder.shdr, ehdr.e_shoff, ehdr.e_shnum, ehdr.e_shentsize)]
+    dynamic = elf.locate_dynamic()
+    if dynamic:
+        tables.append(('dynamic', decoder.dym) + dynamic)
+    for name in ('dynsym', 'symtab'):
+        table = elf.locate_symbols(name)
+        if table:
+            tables.append((name, decoder.sym) + table[:3])
+    return [table for table in tables if table[3] > 0]
+
+
+def best_of(repeat: int, func, *args) -> float:
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def compare_unpack(files: List[str], repeat: int) -> List[dict]:
+    '''
+    在真实文件上对比逐字段解码(decode_per_field)与整表一次读取 + iter_unpack(Elf_Record.read_table),
+    两者的结果先逐项比对, 不一致时抛出异常
+    '''
+    results = []
+    for path in files:
+        with ELF(path) as elf:
+            tables = unpack_tables(elf)
+        with open(path, 'rb') as file:
+            for name, record_class, offset, num, entsize in tables:
+                old = decode_per_field(file, record_class, offset, num, entsize)
+                new = record_class.read_table(file, offset, num, entsize)
+                if list(map(repr, old)) != list(map(repr, new)):
+                    raise Exception("%s %s: 两种解码的结果不一致" % (path, name))
+                per_field = best_of(repeat, decode_per_field, file, record_class, offset, num, entsize)
+                bulk = best_of(repeat, record_class.read_table, file, offset, num, entsize)
+                results.append({'file': path, 'table': name, 'records': num, 'per_field': per_field, 'bulk': bulk,
+                                'speedup': per_field / bulk if bulk else None})
+    print('%-36s %-8s %8s %14s %10s %8s' % ('file', 'table', 'records', 'per_field(us)', 'bulk(us)', 'speedup'), file=sys.stderr)
+    for row in results:
+        print('%-36s %-8s %8d %14.1f %10.1f %7.1fx' % (row['file'][-36:], row['table'], row['records'], row['per_field'] * 1e6,
+                                                      row['bulk'] * 1e6, row['speedup'] or 0.0), file=sys.stderr)
+    return results
+
+
+def bench_tracer(files: List[str], tracers: List[str], repeat: int) -> List[dict]:
+    '''
+    read_elf 在各种 tracer 下的耗时: silent 为关闭(默认), text/json 输出到 os.devnull, 只计格式化和回调本身
+    '''
+    results = []
+    with open(os.devnull, 'w') as devnull:
+        factories = {'silent': lambda: None, 'text': lambda: elflog.text_tracer(devnull),
+                     'json': lambda: elflog.json_tracer(devnull)}
+        for path in files:
+            for name in tracers:
+                times = []
+                for i in range(repeat):
+                    with ELF(path, tracer=factories[name]()) as elf:
+                        start = time.perf_counter()
+                        elf.read_elf()
+                        times.append(time.perf_counter() - start)
+                results.append({'file': path, 'tracer': name, 'min': min(times), 'median': statistics.median(times)})
+    print('%-36s %-7s %10s %12s %7s' % ('file', 'tracer', 'min(us)', 'median(us)', 'ratio'), file=sys.stderr)
+    for row in results:
+        silent = next((r['min'] for r in results if r['file'] == row['file'] and r['tracer'] == 'silent'), None)
+        print('%-36s %-7s %10.1f %12.1f %7s' % (row['file'][-36:], row['tracer'], row['min'] * 1e6, row['median'] * 1e6,
+                                                '%.1fx' % (row['min'] / silent) if silent else '-'), file=sys.stderr)
+    return results
+
+
+def retained(func, *args) -> tuple:
+    '''
+    调用 func(*args), 返回 (结果, 调用后仍保留的新分配内存字节数)
+    '''
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        result = func(*args)
+        return result, tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+
+
+def compare_symbol_memory(sources: List[tuple]) -> List[dict]:
+    '''
+    sources: [(名字, 路径或 bytes)]; 同一张 .dynsym 分别解码为 SymbolTable(按列) 和 Elf_Sym 列表,
+    用 tracemalloc 测量各自保留的内存(不含符号名)
+    '''
+    results = []
+    for label, source in sources:
+        with ELF(source) as elf:
+            table = elf.locate_symbols('dynsym')
+            if not table:
+                continue
+            offset, num, entsize, strtabs = table
+            sym_class = elf.decoder.sym
+            data = bytes(elf.read_data(elf.get_file(), offset, (num - 1) * entsize + sym_class.LAYOUT.size))
+
+        def columns():
+            symbols = SymbolTable()
+            symbols.extend(sym_class, data, num, entsize, strtabs)
+            return symbols
+        columns(), sym_class.unpack_table(data, 0, num, entsize)     # 先各解码一次, 排除第一次调用时的一次性分配
+        symbols, columns_bytes = retained(columns)
+        records, records_bytes = retained(sym_class.unpack_table, data, 0, num, entsize)
+        results.append({'file': label, 'symbols': num, 'symbol_table': columns_bytes, 'elf_sym_list': records_bytes,
+                        'elf_sym_object': sys.getsizeof(records[-1]),
+                        'per_symbol': [columns_bytes / num, records_bytes / num]})
+        del symbols, records
+    print('%-36s %8s %16s %16s %10s' % ('file', 'symbols', 'SymbolTable(B/sym)', 'list(B/sym)', 'Elf_Sym(B)'), file=sys.stderr)
+    for row in results:
+        print('%-36s %8d %18.1f %16.1f %10d' % (row['file'][-36:], row['symbols'], row['per_symbol'][0], row['per_symbol'][1],
+                                               row['elf_sym_object']), file=sys.stderr)
+    return results
+
+
+def bundled_files() -> List[str]:
+    '''
+    仓库自带的 so(各 ABI 目录下的 libnative-lib.so)
+    '''
+    return sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*', '*.so')))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(bits: List[int], sections: int, symbols: int, dynamic: int, repeat: int, files: List[str] = (),
+        keep: str = None, byte_orders: List[str] = ('little',)) -> dict:
+    '''
+    生成语料并逐阶段测量; keep 为目录时生成的文件保留在其中
+    '''
+    results = []
+    with tempfile.TemporaryDirectory() as temp:
+        directory = keep or temp
+        os.makedirs(directory, exist_ok=True)
+        for width in bits:
+            for byte_order in byte_orders:
+                suffix = 'be' if byte_order == 'big' else ''
+                path = os.path.join(directory, 'bench%d%s_%d_%d_%d.so' % (width, suffix, sections, symbols, dynamic))
+                with open(path, 'wb') as file:
+                    file.write(make_elf(width, sections, symbols, dynamic, byte_order == 'big'))
+                results.extend(bench_file(path, 'synthetic%d%s' % (width, suffix), repeat))
+        for path in files:
+            results.extend(bench_file(path, path, repeat))
+    try:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:     # 非 POSIX 平台
+        max_rss = None
+    return {
+        'meta': {'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'max_rss_kb': max_rss,
+                 'params': {'bits': bits, 'byte_orders': list(byte_orders), 'sections': sections, 'symbols': symbols,
+                            'dynamic': dynamic, 'repeat': repeat, 'files': list(files)}},
+        'results': results,
+    }
+
+
+def compare(base: dict, current: dict, threshold: float, metric: str = 'min', floor: float = 100e-6) -> List[dict]:
+    '''
+    按 (file, mode, stage) 对比 metric(min/median/mean), 返回比值超过 threshold 的项;
+    基准耗时低于 floor 秒的阶段受计时抖动影响太大, 只输出不判定
+    '''
+    for result in (base, current):
+        if any('stage' not in row for row in result['results']):
+            raise Exception("只能比较逐阶段测量的结果, --compare-unpack/--tracer/--symbol-memory 的输出不能比较")
+    if base['meta']['params'] != current['meta']['params']:
+        print("警告: 两次运行的参数不同, 比较结果仅供参考", file=sys.stderr)
+    old = {(row['file'], row['mode'], row['stage']): row for row in base['results']}
+    regressions = []
+    print('%-22s %-5s %-28s %12s %12s %7s' % ('file', 'mode', 'stage', 'base(us)', 'now(us)', 'ratio'), file=sys.stderr)
+    for row in current['results']:
+        before = old.get((row['file'], row['mode'], row['stage']))
+        if before is None or not before[metric]:
+            continue
+        ratio = row[metric] / before[metric]
+        regressed = ratio > threshold and before[metric] >= floor
+        print('%-22s %-5s %-28s %12.1f %12.1f %7.2f%s' % (row['file'][-22:], row['mode'], row['stage'], before[metric] * 1e6,
+                                                        row[metric] * 1e6, ratio, ' !' if regressed else ''),
+              file=sys.stderr)
+        if regressed:
+            regressions.append(dict(row, base=before[metric], ratio=ratio))
+    return regressions
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='生成合成 ELF 并逐阶段测量解析耗时和峰值内存')
+    parser.add_argument('--bits', type=int, nargs='+', choices=(32, 64), default=[64, 32], help='生成 32/64 位文件')
+    parser.add_argument('--byte-order', nargs='+', choices=('little', 'big'), default=['little'], help='生成小端/大端文件')
+    parser.add_argument('--sections', type=int, default=200, help='.text.N 节的个数')
+    parser.add_argument('--symbols', type=int, default=20000, help='符号个数(.dynsym 和 .symtab 各一份)')
+    parser.add_argument('--dynamic', type=int, default=100, help='.dynamic 的项数')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='每个阶段的重复次数')
+    parser.add_argument('--files', nargs='*', default=[], help='同时测量的真实文件')
+    parser.add_argument('--keep', default=None, help='保留生成的文件到该目录')
+    parser.add_argument('-o', '--output', default=None, help='结果 JSON, 默认 stdout')
+    modes = parser.add_mutually_exclusive_group()     # 以下专项模式的结果没有 mode/stage, 不能与 --compare 同用
+    modes.add_argument('--compare', default=None, help='与之前的结果 JSON 比较')
+    parser.add_argument('--threshold', type=float, default=1.2, help='比值超过该值视为退化')
+    parser.add_argument('--metric', choices=('min', 'median', 'mean'), default='min',
+                        help='比较用的统计量, min 受调度抖动影响最小')
+    parser.add_argument('--floor-us', type=float, default=100.0, help='基准耗时低于该值(微秒)的阶段不判定退化')
+    modes.add_argument('--compare-unpack', action='store_true',
+                        help='只对比逐字段解码与整表解码(iter_unpack), 默认使用仓库自带的 so, 可用 --files 指定')
+    modes.add_argument('--symbol-memory', action='store_true',
+                        help='只对比 .dynsym 解码为 SymbolTable 和 Elf_Sym 列表时保留的内存, 使用合成文件和自带的 so')
+    modes.add_argument('--tracer', nargs='+', choices=('silent', 'text', 'json'), default=None,
+                        help='只测量各种 tracer 下 read_elf 的耗时, 默认使用 arm64-v8a/libnative-lib.so')
+    args = parser.parse_args(argv)
+
+    if args.symbol_memory:
+        sources = [('synthetic%d' % (width), make_elf(width, 10, args.symbols, 10)) for width in args.bits]
+        sources += [(path, path) for path in args.files or bundled_files()]
+        result = {'meta': {'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                           'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                           'params': {'symbol_memory': True, 'bits': args.bits, 'symbols': args.symbols,
+                                      'files': [label for label, source in sources[len(args.bits):]]}},
+                  'results': compare_symbol_memory(sources)}
+    elif args.compare_unpack or args.tracer:
+        default = bundled_files() if args.compare_unpack else \
+            [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'arm64-v8a', 'libnative-lib.so')]
+        files = args.files or default
+        params = {'repeat': args.repeat, 'files': files}
+        if args.compare_unpack:
+            params['compare_unpack'] = True
+            results = compare_unpack(files, args.repeat)
+        else:
+            params['tracer'] = args.tracer
+            results = bench_tracer(files, args.tracer, args.repeat)
+        result = {'meta': {'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                           'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'params': params},
+                  'results': results}
+    else:
+        result = run(args.bits, args.sections, args.symbols, args.dynamic, args.repeat, args.files, args.keep, args.byte_order)
+    text = json.dumps(result, indent=1)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), result, args.threshold, args.metric, args.floor_us / 1e6)
+        if regressions:
+            print("%d 项退化超过 %.2fx" % (len(regressions), args.threshold), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
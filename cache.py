@@ -0,0 +1,218 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : cache.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+from parse import ELF, Elf_header
+from strtab import StringTable
+from symtab import COLUMNS, SymbolTable
+
+try:
+    import fcntl
+except ImportError:     # 非 POSIX 平台没有 flock, 淘汰时不加锁
+    fcntl = None
+
+'''
+解析结果的磁盘缓存, 需要显式启用:
+
+    cache = ParseCache('/var/cache/elfparse', max_bytes=512 << 20)
+    elf = cache.load(path)      # 命中时不解析原文件, 只做 stat 和内容哈希
+
+- 键: (文件大小, mtime, 内容哈希), 任一变化都视为新文件
+- 内容: ELF 头、程序头表、段表、三张字符串表、.dynamic 以文件本身的结构体布局重新打包; 符号表按列保存 array 的原始字节, 加载时直接 frombytes
+- 写入先写临时文件再 os.replace, 多进程并发读写安全; 命中时更新 mtime, 超过 max_bytes 时按 mtime 淘汰最旧的条目
+'''
+
+MAGIC = b'ELFC'
+VERSION = 2     # 缓存格式或结构体布局变化时递增, 旧条目自动失效
+FILE_HEADER = struct.Struct('<4sHH')    # magic, version, 数据块个数
+BLOCK_HEADER = struct.Struct('<8sQ')    # 数据块名, 长度
+SEGMENT = struct.Struct('<QB')          # 符号表分段: 符号个数, 字符串表(0: 无, 1: strtab, 2: dynstr)
+SUFFIX = '.elfc'
+
+
+def content_key(path: str) -> str:
+    st = os.stat(path)
+    digest = hashlib.blake2b(struct.pack('<QQ', st.st_size, st.st_mtime_ns), digest_size=20)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pack_records(records: list) -> bytes:
+    if not records:
+        return b''
+    layout, fields = records[0].LAYOUT, records[0].FIELDS
+    return b''.join(layout.pack(*(getattr(record, name) for name in fields)) for record in records)
+
+
+def dump_elf(elf: ELF) -> bytes:
+    '''
+    把已解析的表打包为缓存条目
+    '''
+    ehdr = elf.elf_header.elf_ehdr
+    e_ident = ehdr.e_ident
+    symbols = elf.symbol_table
+    blocks = [
+        (b'ehdr', e_ident.LAYOUT.pack(''.join(e_ident.file_identification).encode('utf-8'), e_ident.ei_class_2, e_ident.ei_data,
+                                      e_ident.ei_version, e_ident.ei_osabi, e_ident.ei_abiversion, bytes(e_ident.ei_pad),
+                                      e_ident.ei_nident_SIZE)
+                  + ehdr.LAYOUT.pack(*(getattr(ehdr, name) for name in ehdr.FIELDS))),
+        (b'phdr', pack_records(elf.program_header_table)),
+        (b'shdr', pack_records(elf.section_header_table)),
+        (b'dynamic', pack_records(elf.dynamic_table)),
+        (b'symbols', b''.join(symbols.column(name).tobytes() for name, typecode in COLUMNS)),
+    ]
+    for name, strtabs in ((b'shstrtab', elf.shstrtabs), (b'strtab', elf.strtabs), (b'dynstr', elf.dynstrs)):
+        if strtabs is not None:
+            blocks.append((name, bytes(strtabs)))
+    segments = []
+    ends = symbols.segment_starts[1:] + [len(symbols)]
+    for start, end, strtabs in zip(symbols.segment_starts, ends, symbols.strtabs):
+        which = 1 if strtabs is not None and strtabs is elf.strtabs else 2 if strtabs is not None and strtabs is elf.dynstrs else 0
+        segments.append(SEGMENT.pack(end - start, which))
+    blocks.append((b'symseg', b''.join(segments)))
+    return FILE_HEADER.pack(MAGIC, VERSION, len(blocks)) + b''.join(BLOCK_HEADER.pack(name, len(data)) + data for name, data in blocks)
+
+
+def load_elf(path: str, data: bytes) -> ELF:
+    '''
+    由缓存条目重建 ELF, 各张表直接填入, 不访问原文件
+    '''
+    magic, version, count = FILE_HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise Exception("缓存条目格式不匹配")
+    blocks = {}
+    offset = FILE_HEADER.size
+    for i in range(count):
+        name, size = BLOCK_HEADER.unpack_from(data, offset)
+        offset += BLOCK_HEADER.size
+        if offset + size > len(data):
+            raise Exception("缓存条目不完整")
+        blocks[name.rstrip(b'\0')] = data[offset:offset + size]
+        offset += size
+
+    elf = ELF(path)
+    elf._elf_header = Elf_header(data=blocks[b'ehdr'])
+    decoder = elf.decoder
+    elf._shstrtabs = StringTable(blocks[b'shstrtab']) if b'shstrtab' in blocks else None
+    elf._strtabs = StringTable(blocks[b'strtab']) if b'strtab' in blocks else None
+    elf._dynstrs = StringTable(blocks[b'dynstr']) if b'dynstr' in blocks else None
+    tables = []
+    for name, record in ((b'phdr', decoder.phdr), (b'shdr', decoder.shdr), (b'dynamic', decoder.dym)):
+        size = record.LAYOUT.size
+        tables.append(record.unpack_table(blocks[name], 0, len(blocks[name]) // size, size))
+    elf._program_header_table, elf._section_header_table, elf._dynamic_table = tables
+    for shdr in elf._section_header_table:
+        shdr.read_section_name(elf._shstrtabs)
+    elf.index_sections()
+
+    symbols = SymbolTable()
+    count = 0
+    for num, which in SEGMENT.iter_unpack(blocks[b'symseg']):
+        symbols.segment_starts.append(count)
+        symbols.strtabs.append((None, elf._strtabs, elf._dynstrs)[which])
+        count += num
+    offset = 0
+    for name, typecode in COLUMNS:     # 各列原样保存 array 的字节(本机字节序), 直接 frombytes
+        column = symbols.column(name)
+        column.frombytes(blocks[b'symbols'][offset:offset + count * column.itemsize])
+        offset += count * column.itemsize
+    if len(symbols) != count or offset != len(blocks[b'symbols']):
+        raise Exception("缓存条目不完整")
+    elf._symbol_table = symbols
+    return elf
+
+
+class ParseCache(object):
+    def __init__(self, directory: str, max_bytes: int = 256 << 20):
+        super(ParseCache, self).__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, path: str) -> ELF:
+        '''
+        命中则由缓存重建 ELF, 否则完整解析原文件并写入缓存
+        '''
+        key = content_key(path)
+        elf = self.get(key, path)
+        if elf is None:
+            elf = ELF(path)
+            elf.read_elf()
+            if elf.elf_header is not None:
+                self.put(key, elf)
+        return elf
+
+    def get(self, key: str, path: str) -> ELF:
+        entry = self.entry_path(key)
+        try:
+            with open(entry, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None
+        try:
+            elf = load_elf(path, data)
+        except Exception:       # 旧版本或损坏的条目, 删除后按未命中处理
+            self.remove(entry)
+            return None
+        try:
+            os.utime(entry)     # 更新 mtime, 作为 LRU 的访问时间
+        except OSError:
+            pass
+        return elf
+
+    def put(self, key: str, elf: ELF):
+        data = dump_elf(elf)
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temp, self.entry_path(key))
+        except OSError:
+            self.remove(temp)
+            return
+        self.evict()
+
+    def remove(self, entry: str):
+        try:
+            os.remove(entry)
+        except OSError:
+            pass
+
+    def evict(self):
+        '''
+        总大小超过 max_bytes 时按 mtime 从旧到新删除; 多进程同时淘汰时用 flock 串行化
+        '''
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(SUFFIX):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                total += st.st_size
+            entries.sort()
+            for mtime, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self.remove(path)
+                total -= size
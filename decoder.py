@@ -0,0 +1,75 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : decoder.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import struct
+import sys
+from array import array
+from elf32 import Elf32_Ehdr, Elf32_Phdr, Elf32_Shdr, Elf32_Sym, Elf32_Dym, Elf32_Rel, Elf32_Rela
+from elf64 import Elf64_Ehdr, Elf64_Phdr, Elf64_Shdr, Elf64_Sym, Elf64_Dym, Elf64_Rel, Elf64_Rela
+from base import Elf_Verdef, Elf_Verdaux, Elf_Verneed, Elf_Vernaux
+
+'''
+按 (ei_class, ei_data) 选择整套结构体类型和整数布局, 每个文件只选择一次:
+
+    decoder = get_decoder(e_ident.ei_class_2, e_ident.ei_data)
+    decoder.sym.unpack_table(data, 0, num, entsize)     # Elf32_Sym / Elf64_Sym 的小端或大端版本
+    decoder.u32.unpack_from(data, offset)               # 与文件字节序一致的 32 位整数
+    decoder.array('I', data)                            # 按文件字节序解释的 array, 必要时 byteswap
+
+四种组合在导入时全部预编译, 解析过程中不再按 32/64 位或字节序分支
+'''
+
+ELFCLASS32 = 1
+ELFCLASS64 = 2
+ELFDATA2LSB = 1
+ELFDATA2MSB = 2
+
+
+class Decoder(object):
+    def __init__(self, ei_class: int, ei_data: int):
+        super(Decoder, self).__init__()
+        self.ei_class = ei_class
+        self.ei_data = ei_data
+        self.word_size = 4 if ei_class == ELFCLASS32 else 8
+        self.byte_order = '>' if ei_data == ELFDATA2MSB else '<'
+        self.swap = (ei_data == ELFDATA2MSB) != (sys.byteorder == 'big')     # array.frombytes 按本机字节序
+        classes = (Elf32_Ehdr, Elf32_Phdr, Elf32_Shdr, Elf32_Sym, Elf32_Dym, Elf32_Rel, Elf32_Rela) \
+            if ei_class == ELFCLASS32 else (Elf64_Ehdr, Elf64_Phdr, Elf64_Shdr, Elf64_Sym, Elf64_Dym, Elf64_Rel, Elf64_Rela)
+        self.ehdr, self.phdr, self.shdr, self.sym, self.dym, self.rel, self.rela = (cls.for_data(ei_data) for cls in classes)
+        self.verdef, self.verdaux, self.verneed, self.vernaux = (cls.for_data(ei_data) for cls in
+                                                                 (Elf_Verdef, Elf_Verdaux, Elf_Verneed, Elf_Vernaux))    # 32/64 位相同
+        self.u32 = struct.Struct(self.byte_order + 'I')
+        self.word = struct.Struct(self.byte_order + ('I' if self.word_size == 4 else 'Q'))
+
+    def array(self, typecode: str, data) -> array:
+        '''
+        把 data 按文件字节序解释为 array(typecode)
+        '''
+        values = array(typecode)
+        values.frombytes(data)
+        if self.swap:
+            values.byteswap()
+        return values
+
+    def __repr__(self) -> str:
+        return 'Decoder(ELF%d, %s)' % (self.word_size * 8, 'MSB' if self.ei_data == ELFDATA2MSB else 'LSB')
+
+
+DECODERS = {(ei_class, ei_data): Decoder(ei_class, ei_data)
+            for ei_class in (ELFCLASS32, ELFCLASS64) for ei_data in (ELFDATA2LSB, ELFDATA2MSB)}
+
+
+def get_decoder(ei_class: int, ei_data: int) -> Decoder:
+    '''
+    ei_data 不是 2 时按小端处理(与多数工具一致); ei_class 异常时抛出异常
+    '''
+    decoder = DECODERS.get((ei_class, ELFDATA2MSB if ei_data == ELFDATA2MSB else ELFDATA2LSB))
+    if decoder is None:
+        raise Exception("e_ident -> ei_class_2 数据异常:%d" % (ei_class))
+    return decoder
@@ -0,0 +1,328 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : depgraph.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from collections import deque
+from typing import Dict, Iterator, List
+from base import Elf_Dym
+from batch import capture, walk, worker_pool
+from diff import STB_WEAK, symbol_maps
+from parse import ELF
+
+'''
+由 DT_NEEDED / DT_SONAME 建立整批 so 的依赖图:
+
+    graph = DependencyGraph.build(['./system/lib64', './vendor/lib64'], jobs=16)
+    graph.dependents('libc++_shared.so', transitive=True)    # 反向依赖
+    graph.unresolved('libfoo.so')                            # 在依赖闭包中找不到提供者的导入符号
+    graph.provider('libfoo.so', 'malloc')                    # 按加载顺序哪个库提供了 malloc
+
+    python depgraph.py ./system/lib64 -j 16 --rdeps libc++_shared.so --unresolved libfoo.so
+
+- worker 按动态链接器的方式只读程序头、.dynamic、.dynstr 和 .dynsym(use_sections=False), 不读节头和 .symtab
+- 库以 (e_machine, soname) 为键, soname 缺失时用文件名; 不同架构的同名库互不干扰, 同名的多个文件取先扫描到的
+- 默认匹配 *.so*, 包含 libz.so.1 这样带版本号的文件; 指向同一文件的多个链接名(libz.so -> libz.so.1.2.13)只解析一次
+- 符号 -> 提供者 的索引每个库批量 update 一次, 开销只与该库的导出数有关; 只有重复导出的符号逐个记录
+- 依赖闭包按广度优先(与链接器的符号查找顺序一致)
+'''
+
+
+class Library(object):
+    '''
+    依赖图中的一个库, 只保存解析 .dynamic/.dynsym 得到的名字
+    '''
+    __slots__ = ('id', 'path', 'name', 'machine', 'needed', 'exports', 'imports', 'weak_imports')
+
+    def __init__(self, id: int, path: str, name: str, machine: int, needed: List[str],
+                 exports: frozenset, imports: List[str], weak_imports: List[str]):
+        self.id = id
+        self.path = path
+        self.name = name                    # DT_SONAME, 没有则为文件名
+        self.machine = machine              # e_machine
+        self.needed = needed                # DT_NEEDED, 按 .dynamic 中的顺序
+        self.exports = exports              # 已定义的 GLOBAL/WEAK 符号名
+        self.imports = imports              # 未定义的 GLOBAL 符号名
+        self.weak_imports = weak_imports    # 未定义的 WEAK 符号名, 找不到时链接器不报错
+
+    def __repr__(self) -> str:
+        return 'Library(%r, %r, needed=%d, exports=%d, imports=%d)' \
+            % (self.name, self.path, len(self.needed), len(self.exports), len(self.imports) + len(self.weak_imports))
+
+
+def read_library(path: str) -> dict:
+    '''
+    只解析动态链接需要的部分并返回名字列表; 在 worker 进程中执行, 异常记录到 error 字段
+    '''
+    result = {'path': path}
+    with capture(result), ELF(path, use_mmap=True, use_sections=False) as elf:
+        if not elf.is_valid():
+            raise Exception("不是有效的 ELF 文件")
+        strtabs = elf.dynstrs
+        if strtabs is None:
+            raise Exception("没有 .dynamic 或 DT_STRTAB")
+        needed, soname = [], None
+        for dym in elf.dynamic_table:
+            if dym.d_tag == Elf_Dym.TAG['DT_NEEDED']:
+                needed.append(strtabs.get(dym.d_un))
+            elif dym.d_tag == Elf_Dym.TAG['DT_SONAME'] and soname is None:
+                soname = strtabs.get(dym.d_un)
+        exports, imports = symbol_maps(elf)
+        result.update({
+            'name': soname or os.path.basename(path),
+            'machine': elf.elf_header.elf_ehdr.e_machine,
+            'needed': needed,
+            'exports': list(exports),
+            'imports': [name for name, (value, size, info) in imports.items() if info >> 4 != STB_WEAK],
+            'weak_imports': [name for name, (value, size, info) in imports.items() if info >> 4 == STB_WEAK],
+        })
+    return result
+
+
+def unique_files(paths: Iterator[str]) -> Iterator[str]:
+    '''
+    按 realpath 去重, 同一文件的符号链接只保留先遍历到的
+    '''
+    seen = set()
+    for path in paths:
+        real = os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            yield path
+
+
+class DependencyGraph(object):
+    def __init__(self):
+        super(DependencyGraph, self).__init__()
+        self.libraries: List[Library] = []
+        self.by_name: Dict[tuple, Library] = dict()         # (machine, name) -> 第一个同名库
+        self.first_by_name: Dict[str, Library] = dict()      # name -> 任一架构中第一个同名库
+        self.duplicates: Dict[tuple, List[Library]] = dict()    # (machine, name) -> 之后扫描到的同名库
+        self.dependents_of: Dict[tuple, List[Library]] = dict()     # (machine, 被依赖的名字) -> 直接依赖它的库
+        self.providers_of: Dict[int, Dict[str, int]] = dict()   # machine -> 符号名 -> 第一个导出它的库 id
+        self.more_providers: Dict[tuple, List[int]] = dict()    # (machine, 符号名) -> 之后导出同名符号的库 id
+        self.errors: List[dict] = []
+
+    @classmethod
+    def build(cls, paths: List[str], jobs: int = None, chunksize: int = 16, pattern: str = '*.so*',
+              max_tasks_per_child: int = None, memory_limit: int = 0) -> 'DependencyGraph':
+        '''
+        并行解析 paths 下的全部库并建图
+        '''
+        graph = cls()
+        enabled = gc.isenabled()
+        gc.disable()    # 建图只新增对象、没有循环引用, 关闭 GC 避免对整张图反复扫描
+        try:
+            with worker_pool(jobs, max_tasks_per_child, memory_limit) as executor:
+                for result in executor.map(read_library, unique_files(walk(paths, pattern)), chunksize=chunksize):
+                    graph.add(result)
+        finally:
+            if enabled:
+                gc.enable()
+        return graph
+
+    def add(self, result: dict) -> Library:
+        '''
+        加入 read_library 的结果, 解析失败的记录到 errors
+        '''
+        if 'error' in result:
+            self.errors.append(result)
+            return None
+        exports = frozenset(result['exports'])
+        library = Library(len(self.libraries), result['path'], result['name'], result['machine'], result['needed'],
+                          exports, result['imports'], result['weak_imports'])
+        self.libraries.append(library)
+        machine = library.machine
+        key = (machine, library.name)
+        if key in self.by_name:
+            self.duplicates.setdefault(key, []).append(library)
+            return library      # 同名库不会被链接器加载, 不参与依赖和符号索引
+        self.by_name[key] = library
+        self.first_by_name.setdefault(library.name, library)
+        for name in library.needed:
+            self.dependents_of.setdefault((machine, name), []).append(library)
+        providers = self.providers_of.setdefault(machine, dict())
+        shared = set(filter(providers.__contains__, exports))     # 只遍历本库的导出, 只有重复导出的符号需要逐个记录
+        for symbol in shared:
+            self.more_providers.setdefault((machine, symbol), []).append(library.id)
+        providers.update(dict.fromkeys(exports - shared if shared else exports, library.id))
+        return library
+
+    def get(self, name: str, machine: int = None) -> Library:
+        '''
+        按 soname(或文件名) 查找库; machine 为 None 时返回任一架构中的第一个
+        '''
+        if machine is not None:
+            return self.by_name.get((machine, name))
+        return self.first_by_name.get(name)
+
+    def resolve(self, library: Library, name: str) -> Library:
+        '''
+        library 的 DT_NEEDED 中的 name 对应的库, 不在图中则返回 None
+        '''
+        return self.by_name.get((library.machine, name))
+
+    def dependencies(self, name: str, machine: int = None, transitive: bool = False) -> List[Library]:
+        '''
+        直接依赖, 或按广度优先展开的依赖闭包(不含自身); 找不到的依赖不在结果中, 见 missing()
+        '''
+        library = self.get(name, machine)
+        if library is None:
+            return []
+        if not transitive:
+            return [dep for dep in (self.resolve(library, needed) for needed in library.needed) if dep is not None]
+        return self.load_order(library)[1:]
+
+    def load_order(self, library: Library) -> List[Library]:
+        '''
+        library 及其依赖闭包, 按广度优先排列, 即动态链接器查找符号的顺序
+        '''
+        order = [library]
+        seen = {library.id}
+        queue = deque([library])
+        while queue:
+            current = queue.popleft()
+            for name in current.needed:
+                dep = self.by_name.get((current.machine, name))
+                if dep is not None and dep.id not in seen:
+                    seen.add(dep.id)
+                    order.append(dep)
+                    queue.append(dep)
+        return order
+
+    def dependents(self, name: str, machine: int = None, transitive: bool = False) -> List[Library]:
+        '''
+        直接依赖 name 的库, 或全部直接/间接依赖它的库(反向广度优先)
+        '''
+        library = self.get(name, machine)
+        if library is None:
+            return []
+        result = []
+        seen = {library.id}
+        queue = deque([library])
+        while queue:
+            current = queue.popleft()
+            for dependent in self.dependents_of.get((current.machine, current.name), ()):
+                if dependent.id not in seen:
+                    seen.add(dependent.id)
+                    result.append(dependent)
+                    if transitive:
+                        queue.append(dependent)
+        return result
+
+    def providers(self, symbol: str, machine: int) -> List[Library]:
+        '''
+        导出 symbol 的全部库, 按扫描顺序
+        '''
+        first = self.providers_of.get(machine, {}).get(symbol)
+        if first is None:
+            return []
+        return [self.libraries[i] for i in [first] + self.more_providers.get((machine, symbol), [])]
+
+    def provider(self, name: str, symbol: str, machine: int = None) -> Library:
+        '''
+        库 name 中导入的 symbol 由哪个库提供: 先查全局索引, 只有导出者不唯一时才按加载顺序逐个判断
+        '''
+        library = self.get(name, machine)
+        if library is None:
+            return None
+        return self.find_provider(self.load_order(library), symbol)
+
+    def find_provider(self, order: List[Library], symbol: str) -> Library:
+        machine = order[0].machine
+        first = self.providers_of.get(machine, {}).get(symbol)
+        if first is None:
+            return None
+        if (machine, symbol) not in self.more_providers:    # 只有一个库导出, 只需判断它是否在闭包中
+            return self.libraries[first] if self.libraries[first] in order else None
+        for library in order:
+            if symbol in library.exports:
+                return library
+        return None
+
+    def unresolved(self, name: str, machine: int = None, weak: bool = False) -> List[str]:
+        '''
+        name 的导入符号中, 在自身及依赖闭包中都找不到提供者的; weak=True 时也检查弱引用
+        '''
+        library = self.get(name, machine)
+        if library is None:
+            return []
+        order = self.load_order(library)
+        ids = {dep.id for dep in order}
+        providers = self.providers_of.get(library.machine, {})
+        symbols = library.imports + library.weak_imports if weak else library.imports
+        result = []
+        for symbol in symbols:
+            first = providers.get(symbol)
+            if first is None:
+                result.append(symbol)
+            elif first not in ids and not any(i in ids for i in self.more_providers.get((library.machine, symbol), ())):
+                result.append(symbol)
+        return result
+
+    def missing(self) -> Iterator[tuple]:
+        '''
+        (库, 找不到的 DT_NEEDED 名字), 按扫描顺序
+        '''
+        for library in self.libraries:
+            if self.by_name.get((library.machine, library.name)) is not library:
+                continue
+            for name in library.needed:
+                if (library.machine, name) not in self.by_name:
+                    yield library, name
+
+    def __len__(self) -> int:
+        return len(self.libraries)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='由 DT_NEEDED/DT_SONAME 建立 so 依赖图并查询')
+    parser.add_argument('paths', nargs='+', help='目录或文件')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='进程数, 默认为 CPU 核数')
+    parser.add_argument('-c', '--chunksize', type=int, default=16, help='每次分发给 worker 的文件数')
+    parser.add_argument('-p', '--pattern', default='*.so*', help='文件名匹配模式, 默认包含带版本号的 libfoo.so.1')
+    parser.add_argument('--rdeps', action='append', default=[], help='输出直接和间接依赖该库的库')
+    parser.add_argument('--deps', action='append', default=[], help='输出该库的依赖闭包(加载顺序)')
+    parser.add_argument('--unresolved', action='append', default=[], help='输出该库找不到提供者的导入符号')
+    parser.add_argument('--provider', nargs=2, action='append', default=[], metavar=('LIB', 'SYMBOL'),
+                        help='输出 LIB 导入的 SYMBOL 由哪个库提供')
+    parser.add_argument('--missing', action='store_true', help='输出全部找不到的 DT_NEEDED')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    graph = DependencyGraph.build(args.paths, args.jobs, args.chunksize, args.pattern)
+    elapsed = time.perf_counter() - start
+
+    def emit(record: dict):
+        sys.stdout.write(json.dumps(record) + '\n')
+
+    for name in args.deps:
+        emit({'query': 'deps', 'name': name, 'result': [dep.name for dep in graph.dependencies(name, transitive=True)]})
+    for name in args.rdeps:
+        emit({'query': 'rdeps', 'name': name, 'result': [dep.path for dep in graph.dependents(name, transitive=True)]})
+    for name in args.unresolved:
+        emit({'query': 'unresolved', 'name': name, 'result': graph.unresolved(name)})
+    for name, symbol in args.provider:
+        library = graph.provider(name, symbol)
+        emit({'query': 'provider', 'name': name, 'symbol': symbol, 'result': library.path if library else None})
+    if args.missing:
+        for library, name in graph.missing():
+            emit({'query': 'missing', 'name': library.name, 'path': library.path, 'result': name})
+    for error in graph.errors:
+        emit(error)
+    print("built graph of %d libraries (%d errors, %d symbols) in %.2fs"
+          % (len(graph), len(graph.errors), sum(map(len, graph.providers_of.values())), elapsed), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : diff.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from typing import Iterator, List, Tuple
+from base import Elf_Dym
+from batch import capture, walk, worker_pool
+from parse import ELF
+
+'''
+比较两个版本的 so, 逐条输出差异(生成器, 不在内存中攒结果):
+
+    for change in diff(ELF('old/libfoo.so'), ELF('new/libfoo.so')):
+        print(change)
+
+    python diff.py old/libfoo.so new/libfoo.so
+    python diff.py old_dir new_dir -j 16 -o changes.jsonl     # 目录按相对路径配对
+
+- 符号: 导出(已定义的 GLOBAL/WEAK)和导入(未定义)按名字建 dict 后做哈希连接, 不做两两比较
+        change 为 added / removed / resized(st_size 变化) / moved(st_value 变化) / retyped(类型或绑定变化)
+- 节: 按节名连接, added / removed / resized / moved / retyped
+- 段: 按 (p_type, 同类型中的序号) 连接, added / removed / resized / moved / flags
+- DT_NEEDED / DT_SONAME: added / removed / changed
+'''
+
+STB_GLOBAL = 1
+STB_WEAK = 2
+STB_GNU_UNIQUE = 10
+PT_NAMES = {0: 'PT_NULL', 1: 'PT_LOAD', 2: 'PT_DYNAMIC', 3: 'PT_INTERP', 4: 'PT_NOTE', 5: 'PT_SHLIB', 6: 'PT_PHDR',
+            7: 'PT_TLS', 0x6474e550: 'PT_GNU_EH_FRAME', 0x6474e551: 'PT_GNU_STACK', 0x6474e552: 'PT_GNU_RELRO'}
+
+
+def symbol_maps(elf: ELF) -> Tuple[dict, dict]:
+    '''
+    (导出, 导入): 符号名 -> (st_value, st_size, st_info); 同名时保留 symbol_table 中靠前的
+    '''
+    exports = dict()
+    imports = dict()
+    symbols = elf.symbol_table
+    for name, value, size, info, shndx in zip(symbols.names(), symbols.st_value, symbols.st_size,
+                                              symbols.st_info, symbols.st_shndx):
+        if not name or (info >> 4) not in (STB_GLOBAL, STB_WEAK, STB_GNU_UNIQUE):
+            continue
+        (imports if shndx == 0 else exports).setdefault(name, (value, size, info))
+    return exports, imports
+
+
+def symbol_record(entry: tuple) -> dict:
+    value, size, info = entry
+    return {'value': value, 'size': size, 'type': info & 0xf, 'bind': info >> 4}
+
+
+def diff_symbols(old: dict, new: dict, kind: str) -> Iterator[dict]:
+    for name in sorted(old.keys() - new.keys()):
+        yield {'kind': kind, 'change': 'removed', 'name': name, 'old': symbol_record(old[name])}
+    for name in sorted(new.keys() - old.keys()):
+        yield {'kind': kind, 'change': 'added', 'name': name, 'new': symbol_record(new[name])}
+    if kind == 'import':    # 导入符号的地址和大小没有意义
+        return
+    for name in sorted(old.keys() & new.keys()):
+        a, b = old[name], new[name]
+        if a == b:
+            continue
+        change = 'resized' if a[1] != b[1] else 'moved' if a[0] != b[0] else 'retyped'
+        yield {'kind': kind, 'change': change, 'name': name, 'old': symbol_record(a), 'new': symbol_record(b)}
+
+
+def diff_keyed(kind: str, old: dict, new: dict, record, checks: tuple) -> Iterator[dict]:
+    '''
+    按键连接两组记录; checks 为 (change, 比较用的字段) 序列, 第一个不同的决定 change
+    '''
+    for key in old:
+        if key not in new:
+            yield {'kind': kind, 'change': 'removed', 'name': key, 'old': record(old[key])}
+    for key in new:
+        if key not in old:
+            yield {'kind': kind, 'change': 'added', 'name': key, 'new': record(new[key])}
+            continue
+        a, b = old[key], new[key]
+        for change, fields in checks:
+            if any(getattr(a, field) != getattr(b, field) for field in fields):
+                yield {'kind': kind, 'change': change, 'name': key, 'old': record(a), 'new': record(b)}
+                break
+
+
+def section_map(elf: ELF) -> dict:
+    sections = dict()
+    for shdr in elf.section_header_table:
+        if shdr.section_name:
+            sections.setdefault(shdr.section_name, shdr)
+    return sections
+
+
+def section_record(shdr) -> dict:
+    return {'type': shdr.sh_type, 'flags': shdr.sh_flags, 'addr': shdr.sh_addr, 'size': shdr.sh_size}
+
+
+def segment_map(elf: ELF) -> dict:
+    '''
+    段没有名字, 以 "类型#同类型中的序号" 为键, 如 PT_LOAD#1
+    '''
+    segments = dict()
+    counts = dict()
+    for phdr in elf.program_header_table:
+        index = counts[phdr.p_type] = counts.get(phdr.p_type, -1) + 1
+        segments['%s#%d' % (PT_NAMES.get(phdr.p_type, hex(phdr.p_type)), index)] = phdr
+    return segments
+
+
+def segment_record(phdr) -> dict:
+    return {'vaddr': phdr.p_vaddr, 'filesz': phdr.p_filesz, 'memsz': phdr.p_memsz, 'flags': phdr.p_flags}
+
+
+def dynamic_strings(elf: ELF, tag: str) -> List[str]:
+    '''
+    .dynamic 中类型为 tag(DT_NEEDED/DT_SONAME) 的全部字符串
+    '''
+    d_tag = Elf_Dym.TAG[tag]
+    strtabs = elf.dynstrs
+    if strtabs is None:
+        return []
+    return [strtabs.get(dym.d_un) for dym in elf.dynamic_table if dym.d_tag == d_tag]
+
+
+def diff(elf_a: ELF, elf_b: ELF) -> Iterator[dict]:
+    '''
+    逐条产生 elf_a -> elf_b 的差异, 每条为一个 dict: kind(symbol/import/section/segment/needed/soname), change, name, old/new
+    '''
+    soname_a, soname_b = dynamic_strings(elf_a, 'DT_SONAME'), dynamic_strings(elf_b, 'DT_SONAME')
+    if soname_a != soname_b:
+        yield {'kind': 'soname', 'change': 'changed', 'old': soname_a[0] if soname_a else None,
+               'new': soname_b[0] if soname_b else None}
+    needed_a, needed_b = dynamic_strings(elf_a, 'DT_NEEDED'), dynamic_strings(elf_b, 'DT_NEEDED')
+    for name in needed_a:
+        if name not in needed_b:
+            yield {'kind': 'needed', 'change': 'removed', 'name': name}
+    for name in needed_b:
+        if name not in needed_a:
+            yield {'kind': 'needed', 'change': 'added', 'name': name}
+    yield from diff_keyed('segment', segment_map(elf_a), segment_map(elf_b), segment_record,
+                          (('moved', ('p_vaddr',)), ('resized', ('p_filesz', 'p_memsz')), ('flags', ('p_flags',))))
+    yield from diff_keyed('section', section_map(elf_a), section_map(elf_b), section_record,
+                          (('moved', ('sh_addr',)), ('resized', ('sh_size',)), ('retyped', ('sh_type', 'sh_flags'))))
+    exports_a, imports_a = symbol_maps(elf_a)
+    exports_b, imports_b = symbol_maps(elf_b)
+    yield from diff_symbols(exports_a, exports_b, 'symbol')
+    yield from diff_symbols(imports_a, imports_b, 'import')
+
+
+def diff_files(pair: Tuple[str, str], use_sections: bool = True) -> dict:
+    '''
+    比较一对文件, 返回 {'old', 'new', 'changes'} 或 error; 在 worker 进程中执行
+    '''
+    old, new = pair
+    result = {'old': old, 'new': new}
+    with capture(result), ELF(old, use_mmap=True, use_sections=use_sections) as elf_a, \
+            ELF(new, use_mmap=True, use_sections=use_sections) as elf_b:
+        for elf in (elf_a, elf_b):
+            if not elf.is_valid():
+                raise Exception("%s 不是有效的 ELF 文件" % (elf.path))
+        result['changes'] = list(diff(elf_a, elf_b))
+    return result
+
+
+def pair_paths(old: str, new: str, pattern: str = '*.so') -> Iterator[tuple]:
+    '''
+    两个文件直接配对; 两个目录按相对路径配对, 只在一边存在的文件产生 (old, None) 或 (None, new)
+    '''
+    if os.path.isfile(old) and os.path.isfile(new):
+        yield old, new
+        return
+    old_files = {os.path.relpath(path, old): path for path in walk([old], pattern)}
+    new_files = {os.path.relpath(path, new): path for path in walk([new], pattern)}
+    for name in sorted(old_files.keys() | new_files.keys()):
+        yield old_files.get(name), new_files.get(name)
+
+
+def run(old: str, new: str, output=None, jobs: int = None, chunksize: int = 16, pattern: str = '*.so',
+        use_sections: bool = True, max_tasks_per_child: int = None, memory_limit: int = 0) -> dict:
+    '''
+    并行比较并把结果逐行写入 output(JSON Lines, 每对文件一行), 返回统计信息
+    '''
+    output = output or sys.stdout
+    start = time.perf_counter()
+    pairs = changed = errors = 0
+    single = []     # 只在一边存在的文件, 不需要解析
+
+    def both_sides():
+        for a, b in pair_paths(old, new, pattern):
+            if a is None or b is None:
+                single.append({'old': a, 'new': b, 'change': 'added' if a is None else 'removed'})
+            else:
+                yield a, b
+
+    with worker_pool(jobs, max_tasks_per_child, memory_limit) as executor:
+        for result in executor.map(functools.partial(diff_files, use_sections=use_sections), both_sides(),
+                                   chunksize=chunksize):
+            output.write(json.dumps(result) + '\n')
+            pairs += 1
+            changed += bool(result.get('changes'))
+            errors += 'error' in result
+    for result in single:
+        output.write(json.dumps(result) + '\n')
+    elapsed = time.perf_counter() - start
+    return {'pairs': pairs, 'changed': changed, 'errors': errors, 'single': len(single), 'seconds': elapsed,
+            'pairs_per_sec': pairs / elapsed if elapsed else 0.0}
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='比较两个版本的 ELF 文件(或目录), 输出 JSON Lines')
+    parser.add_argument('old', help='旧版本的文件或目录')
+    parser.add_argument('new', help='新版本的文件或目录')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='进程数, 默认为 CPU 核数')
+    parser.add_argument('-c', '--chunksize', type=int, default=16, help='每次分发给 worker 的文件对数')
+    parser.add_argument('-o', '--output', default=None, help='输出文件, 默认 stdout')
+    parser.add_argument('-p', '--pattern', default='*.so', help='文件名匹配模式')
+    parser.add_argument('--no-sections', action='store_true', help='不读取节头, 只通过程序头和 .dynamic 解析')
+    parser.add_argument('--max-tasks-per-child', type=int, default=None, help='worker 处理多少个任务后重启')
+    parser.add_argument('--memory-limit', type=int, default=0, help='单个 worker 的内存上限(MB)')
+    args = parser.parse_args(argv)
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        stats = run(args.old, args.new, output, args.jobs, args.chunksize, args.pattern, not args.no_sections,
+                    args.max_tasks_per_child, args.memory_limit)
+    finally:
+        if args.output:
+            output.close()
+    print("compared %d pairs (%d changed, %d errors, %d only on one side) in %.2fs, %.1f pairs/s"
+          % (stats['pairs'], stats['changed'], stats['errors'], stats['single'], stats['seconds'],
+             stats['pairs_per_sec']), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,133 +7,52 @@
 # Author     ：Yooha
 """
 
-import struct
-from io import TextIOWrapper
-from base import Elf_Ehdr, Elf_Phdr, Elf_Shdr, Elf_Sym, Elf_Dym
+from base import Elf_Ehdr, Elf_Phdr, Elf_Shdr, Elf_Sym, Elf_Dym, Elf_Rel, Elf_Rela, record_layout
 
+'''
+32 位结构体的内存布局, 字段顺序与文件中一致; 地址/偏移/大小类字段为 32 位
+'''
 
-class Elf32_Ehdr(Elf_Ehdr):
-    def __init__(self):
-        Elf_Ehdr.__init__(self)
-
-    def read_e_entry(self, file: TextIOWrapper):
-        self.e_entry = struct.unpack('I', file.read(4))[0]
-        print("read e_entry = 0x%x" % (self.e_entry))
 
-    def read_e_phoff(self, file: TextIOWrapper):
-        self.e_phoff = struct.unpack('I', file.read(4))[0]
-        print("read e_phoff = %d" % (self.e_phoff))
+class Elf32_Ehdr(Elf_Ehdr):
+    __slots__ = ()
+    FIELDS, LAYOUT = record_layout(('e_type', 'H'), ('e_machine', 'H'), ('e_version', 'I'),   # e_ident 之后的部分
+                                    ('e_entry', 'I'), ('e_phoff', 'I'), ('e_shoff', 'I'),
+                                    ('e_flags', 'I'), ('e_ehsize', 'H'), ('e_phentsize', 'H'), ('e_phnum', 'H'),
+                                    ('e_shentsize', 'H'), ('e_shnum', 'H'), ('e_shtrndx', 'H'))
 
-    def read_e_shoff(self, file: TextIOWrapper):
-        self.e_shoff = struct.unpack('I', file.read(4))[0]
-        print("read e_shoff = %d" % (self.e_shoff))
 
 class Elf32_Phdr(Elf_Phdr):
-    def __init__(self):
-        Elf_Phdr.__init__(self)
-
-    def read_Phdr(self, file: TextIOWrapper): 
-        self.read_p_type(file)
-        self.read_p_offset(file)
-        self.read_p_vaddr(file)
-        self.read_p_paddr(file)
-        self.read_p_filesz(file)
-        self.read_p_memsz(file)
-        self.read_p_flags(file)
-        self.read_p_align(file)
-        print('\n')
-
-    def read_p_offset(self, file: TextIOWrapper):
-        self.p_offset = struct.unpack('I', file.read(4))[0]
-        print("read p_offset = 0x%x" % (self.p_offset))
-
-    def read_p_vaddr(self, file: TextIOWrapper):
-        self.p_vaddr = struct.unpack('I', file.read(4))[0]
-        print("read p_vaddr = 0x%x" % (self.p_vaddr))
-
-    def read_p_paddr(self, file: TextIOWrapper):
-        self.p_paddr = struct.unpack('I', file.read(4))[0]
-        print("read p_paddr = 0x%x" % (self.p_paddr))
-
-    def read_p_filesz(self, file: TextIOWrapper):
-        self.p_filesz = struct.unpack('I', file.read(4))[0]
-        print("read p_filesz = %d" % (self.p_filesz))
-
-    def read_p_memsz(self, file: TextIOWrapper):
-        self.p_memsz = struct.unpack('I', file.read(4))[0]
-        print("read p_memsz = %d" % (self.p_memsz))
-
-    def read_p_align(self, file: TextIOWrapper):
-        self.p_align = struct.unpack('I', file.read(4))[0]
-        print("read p_align = %d" % (self.p_align))
+    __slots__ = ()
+    FIELDS, LAYOUT = record_layout(('p_type', 'I'), ('p_offset', 'I'), ('p_vaddr', 'I'), ('p_paddr', 'I'),
+                                    ('p_filesz', 'I'), ('p_memsz', 'I'), ('p_flags', 'I'), ('p_align', 'I'))
 
 
 class Elf32_Shdr(Elf_Shdr):
-    def __init__(self):
-        Elf_Shdr.__init__(self)
-
-    def read_sh_flags(self, file: TextIOWrapper):
-        self.sh_flags = struct.unpack('I', file.read(4))[0]
-        print("read sh_flags = %d" % (self.sh_flags))
-
-    def read_sh_addr(self, file: TextIOWrapper):
-        self.sh_addr = struct.unpack('I', file.read(4))[0]
-        print("read sh_addr = 0x%x" % (self.sh_addr))
-
-    def read_sh_offset(self, file: TextIOWrapper):
-        self.sh_offset = struct.unpack('I', file.read(4))[0]
-        print("read sh_offset = 0x%x" % (self.sh_offset))
-
-    def read_sh_size(self, file: TextIOWrapper):
-        self.sh_size = struct.unpack('I', file.read(4))[0]
-        print("read sh_size = %d" % (self.sh_size))
-
-    def read_sh_addralign(self, file: TextIOWrapper):
-        self.sh_addralign = struct.unpack('I', file.read(4))[0]
-        print("read sh_addralign = %d" % (self.sh_addralign))
-
-    def read_sh_entsize(self, file: TextIOWrapper):
-        self.sh_entsize = struct.unpack('I', file.read(4))[0]
-        print("read sh_entsize = %d" % (self.sh_entsize))
+    __slots__ = ()
+    FIELDS, LAYOUT = record_layout(('sh_name', 'I'), ('sh_type', 'I'), ('sh_flags', 'I'), ('sh_addr', 'I'),
+                                    ('sh_offset', 'I'), ('sh_size', 'I'), ('sh_link', 'I'), ('sh_info', 'I'),
+                                    ('sh_addralign', 'I'), ('sh_entsize', 'I'))
 
 
 class Elf32_Sym(Elf_Sym):
-    def __init__(self):
-        Elf_Sym.__init__(self)
-
-    def read_Sym(self, file: TextIOWrapper):
-        self.read_st_name(file)
-        self.read_st_value(file)
-        self.read_st_size(file)
-        self.read_st_info(file)
-        self.read_st_other(file)
-        self.read_st_shndx(file)
-        
-    def read_st_value(self, file: TextIOWrapper):
-        self.st_value = struct.unpack('I', file.read(4))[0]
-        print("read st_value = %d" % (self.st_value))
-
-    def read_st_size(self, file: TextIOWrapper):
-        self.st_size = struct.unpack('I', file.read(4))[0]
-        print("read st_size = %d" % (self.st_size))
+    __slots__ = ()
+    FIELDS, LAYOUT = record_layout(('st_name', 'I'), ('st_value', 'I'), ('st_size', 'I'),
+                                    ('st_info', 'B'), ('st_other', 'B'), ('st_shndx', 'H'))
 
 
 class Elf32_Dym(Elf_Dym):
-    def __init__(self):
-        Elf_Dym.__init__(self)
-
-
-    def read_d_tag(self, file: TextIOWrapper):
-        self.d_tag = struct.unpack('i', file.read(4))[0]
-        keys = Elf_Dym.TAG.keys()
-        for key in keys:
-            if self.d_tag == Elf_Dym.TAG[key]:
-                print('read d_tag = 0x%-8x  type = %s' % (self.d_tag, key))
-                return
+    __slots__ = ()
+    FIELDS, LAYOUT = record_layout(('d_tag', 'i'), ('d_un', 'I'))
 
-    def read_d_un(self, file: TextIOWrapper):
-        self.d_un = struct.unpack('I', file.read(4))[0]
-        print("read d_un = 0x%x\n" % (self.d_un))
 
+class Elf32_Rel(Elf_Rel):
+    __slots__ = ()
+    INFO_SHIFT = 8
+    FIELDS, LAYOUT = record_layout(('r_offset', 'I'), ('r_info', 'I'))
 
 
+class Elf32_Rela(Elf_Rela):
+    __slots__ = ()
+    INFO_SHIFT = 8
+    FIELDS, LAYOUT = record_layout(('r_offset', 'I'), ('r_info', 'I'), ('r_addend', 'i'))
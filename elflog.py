@@ -0,0 +1,70 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : elflog.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import contextvars
+import json
+import sys
+
+'''
+解析过程的逐字段日志, 默认关闭。
+
+关闭时每张表(或每次单项读取)只多一次 ContextVar.get();
+开启时把每个字段交给回调, 可输出为文本或 JSON Lines:
+
+    elf = ELF(path, tracer=elflog.text_tracer())
+    elf = ELF(path, tracer=elflog.json_tracer(open('trace.jsonl', 'w')))
+    elf = ELF(path, tracer=elflog.Tracer(records.append))
+'''
+
+_current = contextvars.ContextVar('elflog_tracer', default=None)
+
+
+class Tracer(object):
+    def __init__(self, callback):
+        super(Tracer, self).__init__()
+        self.callback = callback    # 接收一个 dict: {'struct': 结构体名, 'field': 字段名, 'value': 值}
+
+    def record(self, record: object):
+        struct_name = type(record).__name__
+        for name in record.FIELDS:
+            self.callback({'struct': struct_name, 'field': name, 'value': getattr(record, name)})
+
+    def records(self, records: list):
+        for record in records:
+            self.record(record)
+
+
+def text_tracer(stream=None) -> Tracer:
+    '''
+    与旧版 print 相同的文本格式: read <field> = <value>
+    '''
+    def write(item: dict):
+        print("read %s = %s" % (item['field'], item['value']), file=stream or sys.stdout)
+    return Tracer(write)
+
+
+def json_tracer(stream=None) -> Tracer:
+    '''
+    每个字段输出一行 JSON
+    '''
+    def write(item: dict):
+        (stream or sys.stdout).write(json.dumps(item, default=str) + '\n')
+    return Tracer(write)
+
+
+def activate(tracer: Tracer) -> contextvars.Token:
+    return _current.set(tracer)
+
+
+def deactivate(token: contextvars.Token):
+    _current.reset(token)
+
+
+def get_tracer() -> Tracer:
+    return _current.get()
@@ -0,0 +1,177 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : elfstats.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import contextlib
+import contextvars
+import sys
+import time
+from typing import Callable, Dict, Iterator
+
+'''
+解析过程的分阶段统计, 默认关闭。
+
+阶段即 ELF.load 调用的每个 reader(read_elf_header、read_program_header_table、get_shstrtab、read_section_header_table、
+get_strtab、read_symbol_table、get_dynstr、read_dynamic_symbol_table、read_dynamic_table 等), 另有打开文件的 open。
+每个阶段记录:
+- seconds: 墙钟时间, 不含嵌套阶段(如 read_section_header_table 中首次用到 .shstrtab 时的 get_shstrtab), 各阶段之和即总耗时
+- reads / seeks / bytes_read: 文件对象上的 read/seek 调用次数和读取的字节数(每次调用对应一次系统调用或缓冲区读取)
+- mapped_bytes: mmap 模式或缓冲区输入时, 直接在映射上访问的字节数(不产生系统调用)
+- records: 解析出的表项数(程序头、节头、符号、.dynamic、重定位)
+- blocks: 阶段前后 sys.getallocatedblocks() 的差, 即该阶段新分配且仍存活的对象(内存块)数
+
+    elf = ELF(path, stats=elfstats.ParseStats())
+    elf.read_elf()
+    print(elf.stats)                        # 表格
+    elf.stats.as_dict()                     # {阶段: {...}}
+
+    with elfstats.collect(callback=print) as stats:   # 期间新建的 ELF 都汇总到 stats, 每个阶段结束时回调
+        for path in paths:
+            ELF(path).read_elf()
+
+关闭时(ELF.stats 为 None)每次 load 和每次映射读取只多一次 None 判断, 文件对象不做包装。
+'''
+
+FIELDS = ('calls', 'seconds', 'reads', 'seeks', 'bytes_read', 'mapped_bytes', 'records', 'blocks')
+
+_current = contextvars.ContextVar('elfstats_collector', default=None)
+
+
+class StageStats(object):
+    __slots__ = FIELDS
+
+    def __init__(self):
+        for name in FIELDS:
+            setattr(self, name, 0)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def add(self, other: 'StageStats'):
+        for name in FIELDS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def __repr__(self) -> str:
+        return 'StageStats(%s)' % (', '.join('%s=%r' % (name, getattr(self, name)) for name in FIELDS))
+
+
+class ParseStats(object):
+    def __init__(self, callback: Callable[[str, dict], None] = None):
+        '''
+        callback: 每个阶段结束时调用 callback(阶段名, 该次的统计 dict)
+        '''
+        super(ParseStats, self).__init__()
+        self.callback = callback
+        self.stages: Dict[str, StageStats] = dict()     # 阶段名 -> 累计值, 按首次出现的顺序
+        self.stack = []     # 进行中的阶段: [名字, 本次统计, 计时起点, 内存块计数起点]
+
+    def current(self) -> StageStats:
+        '''
+        当前(最内层)阶段的本次统计, 不在任何阶段中时计入 'other'
+        '''
+        if self.stack:
+            return self.stack[-1][1]
+        return self.stages.setdefault('other', StageStats())
+
+    def enter(self, name: str):
+        now, blocks = time.perf_counter(), sys.getallocatedblocks()
+        if self.stack:      # 暂停外层阶段, 嵌套阶段的耗时不计入外层
+            self.pause(self.stack[-1], now, blocks)
+        self.stack.append([name, StageStats(), now, blocks])
+
+    def exit(self):
+        now, blocks = time.perf_counter(), sys.getallocatedblocks()
+        frame = self.stack.pop()
+        self.pause(frame, now, blocks)
+        name, stage = frame[0], frame[1]
+        stage.calls = 1
+        self.stages.setdefault(name, StageStats()).add(stage)
+        if self.stack:      # 恢复外层阶段
+            self.stack[-1][2], self.stack[-1][3] = time.perf_counter(), sys.getallocatedblocks()
+        if self.callback is not None:
+            self.callback(name, stage.as_dict())
+
+    @staticmethod
+    def pause(frame: list, now: float, blocks: int):
+        frame[1].seconds += now - frame[2]
+        frame[1].blocks += blocks - frame[3]
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        self.enter(name)
+        try:
+            yield self.stack[-1][1]
+        finally:
+            self.exit()
+
+    def read(self, size: int):
+        stage = self.current()
+        stage.reads += 1
+        stage.bytes_read += size
+
+    def seek(self):
+        self.current().seeks += 1
+
+    def mapped(self, size: int):
+        self.current().mapped_bytes += size
+
+    def records(self, num: int):
+        self.current().records += num
+
+    def total(self) -> StageStats:
+        total = StageStats()
+        for stage in self.stages.values():
+            total.add(stage)
+        return total
+
+    def as_dict(self) -> dict:
+        return {name: stage.as_dict() for name, stage in self.stages.items()}
+
+    def __str__(self) -> str:
+        lines = ['%-28s %6s %10s %7s %7s %11s %11s %9s %9s' % (('stage',) + FIELDS)]
+        for name, stage in list(self.stages.items()) + [('total', self.total())]:
+            lines.append('%-28s %6d %10.6f %7d %7d %11d %11d %9d %9d' % ((name,) + tuple(getattr(stage, field) for field in FIELDS)))
+        return '\n'.join(lines)
+
+
+class CountingFile(object):
+    '''
+    包装文件对象, 把 read/seek 计入 stats 的当前阶段; 其余属性(fileno、close 等)直接转发
+    '''
+    def __init__(self, file, stats: ParseStats):
+        self.file = file
+        self.stats = stats
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        self.stats.read(len(data))
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self.stats.seek()
+        return self.file.seek(offset, whence)
+
+    def __getattr__(self, name: str):
+        return getattr(self.file, name)
+
+
+@contextlib.contextmanager
+def collect(stats: ParseStats = None, callback: Callable[[str, dict], None] = None) -> Iterator[ParseStats]:
+    '''
+    期间新建的、未显式指定 stats 的 ELF 都记录到同一个 ParseStats
+    '''
+    stats = stats or ParseStats(callback)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def get_collector() -> ParseStats:
+    return _current.get()
@@ -0,0 +1,121 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : hashtab.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import struct
+
+'''
+动态符号哈希表, 与动态链接器查找符号的方式相同, 一次查找只访问少量表项
+- DT_GNU_HASH -> .gnu.hash : nbuckets, symoffset, bloom_size, bloom_shift, bloom[], buckets[], chain[]
+- DT_HASH     -> .hash     : nbucket, nchain, bucket[], chain[]
+没有节头时 symbol_count() 给出 .dynsym 的表项数
+byte_order 为文件的字节序('<' 或 '>', 见 decoder.py), 各布局在构造时按它编译一次
+'''
+
+
+def gnu_hash(name: bytes) -> int:
+    h = 5381
+    for c in name:
+        h = (h * 33 + c) & 0xffffffff
+    return h
+
+
+def elf_hash(name: bytes) -> int:
+    h = 0
+    for c in name:
+        h = (h << 4) + c
+        g = h & 0xf0000000
+        if g:
+            h ^= g >> 24
+        h &= ~g & 0xffffffff
+    return h
+
+
+class GnuHashTable(object):
+    HEADER = 'IIII'
+
+    def __init__(self, data, offset: int, word_size: int, byte_order: str = '<'):
+        '''
+        data: 包含哈希表的缓冲区(通常是整个文件的 mmap), offset: 哈希表在其中的偏移
+        word_size: bloom 过滤器的字长, 32 位 ELF 为 4, 64 位为 8
+        '''
+        super(GnuHashTable, self).__init__()
+        self.data = data
+        header = struct.Struct(byte_order + self.HEADER)
+        self.nbuckets, self.symoffset, bloom_size, self.bloom_shift = header.unpack_from(data, offset)
+        self.bloom_bits = word_size * 8
+        offset += header.size
+        self.bloom = struct.unpack_from('%s%d%s' % (byte_order, bloom_size, 'Q' if word_size == 8 else 'I'), data, offset)
+        offset += bloom_size * word_size
+        self.buckets = struct.unpack_from('%s%dI' % (byte_order, self.nbuckets), data, offset)
+        self.chain_offset = offset + self.nbuckets * 4
+        self.chain = struct.Struct(byte_order + 'I')
+
+    def lookup(self, name: bytes, match) -> int:
+        '''
+        返回符号在 .dynsym 中的下标, 找不到返回 None; match(index) 判断该下标的符号名是否为 name
+        '''
+        if self.nbuckets == 0 or len(self.bloom) == 0:
+            return None
+        h = gnu_hash(name)
+        bits = self.bloom_bits
+        word = self.bloom[(h // bits) % len(self.bloom)]
+        mask = (1 << (h % bits)) | (1 << ((h >> self.bloom_shift) % bits))
+        if word & mask != mask:
+            return None
+        index = self.buckets[h % self.nbuckets]
+        if index < self.symoffset:
+            return None
+        unpack_from = self.chain.unpack_from
+        while True:
+            chain_hash = unpack_from(self.data, self.chain_offset + (index - self.symoffset) * 4)[0]
+            if (chain_hash | 1) == (h | 1) and match(index):
+                return index
+            if chain_hash & 1:
+                return None
+            index += 1
+
+    def symbol_count(self) -> int:
+        '''
+        .dynsym 的符号个数: 从最大的 bucket 起沿链表走到结束标志(最低位为 1), 没有节头时用来确定表的大小
+        '''
+        index = max(self.buckets, default=0)
+        if index < self.symoffset:
+            return self.symoffset
+        unpack_from = self.chain.unpack_from
+        while not unpack_from(self.data, self.chain_offset + (index - self.symoffset) * 4)[0] & 1:
+            index += 1
+        return index + 1
+
+
+class SysvHashTable(object):
+    HEADER = 'II'
+
+    def __init__(self, data, offset: int, byte_order: str = '<'):
+        super(SysvHashTable, self).__init__()
+        self.data = data
+        header = struct.Struct(byte_order + self.HEADER)
+        self.nbucket, self.nchain = header.unpack_from(data, offset)
+        offset += header.size
+        self.buckets = struct.unpack_from('%s%dI' % (byte_order, self.nbucket), data, offset)
+        self.chain_offset = offset + self.nbucket * 4
+        self.chain = struct.Struct(byte_order + 'I')
+
+    def lookup(self, name: bytes, match) -> int:
+        if self.nbucket == 0:
+            return None
+        index = self.buckets[elf_hash(name) % self.nbucket]
+        unpack_from = self.chain.unpack_from
+        while index != 0 and index < self.nchain:   # 0 为 STN_UNDEF, 链表结束
+            if match(index):
+                return index
+            index = unpack_from(self.data, self.chain_offset + index * 4)[0]
+        return None
+
+    def symbol_count(self) -> int:
+        return self.nchain      # nchain 与 .dynsym 的表项数相同
@@ -0,0 +1,271 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : incremental.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, Iterator, List
+from batch import capture, walk
+from diff import diff
+from parse import ELF
+from symtab import SymbolTable
+
+'''
+增量重新解析: 文件被改写(打补丁、改 sh_offset、重新链接)后, 只重新解码内容变化了的表, 其余表沿用上一次的解析结果。
+
+    parser = IncrementalParser('libfoo.so')
+    elf = parser.parse()            # 第一次: 完整解析, 记录每张表的校验和
+    ...                             # 文件被改写
+    elf = parser.parse()            # 只解码变化的表
+    parser.report                   # {'decoded': [...], 'reused': [...], 'hashed_bytes': ..., 'seconds': ...}
+
+    python incremental.py watch libs/ -p '*.so' --diff      # 轮询目录, 文件改写后增量解析并输出差异(JSON Lines)
+
+- 每张表记录 (大小, 表项大小, 内容的 blake2b) 签名, 不含文件偏移: 表只是被移动时内容相同, 直接沿用
+- 表: phdr(程序头表), sections(节头表 + .shstrtab), dynamic, strtab, dynstr, symtab, dynsym;
+      .symtab 和 .dynsym 各自独立判断, 沿用的一段按列切片复制, 并重新绑定到本次的字符串表
+- 表的位置仍按 ELF 的查找规则(节头、sh_link、PT_DYNAMIC、DT_* 和哈希表)在新文件上重新确定, 找不到位置的表总是重新解码
+- 计算签名只读取各张表所在的页(在映射上直接计算, 不拷贝), 代价远小于解码; 解码的代价只与变化的表成正比
+- 重定位、哈希表、符号索引等派生数据不沿用, 在新的 ELF 上按需重新解析
+'''
+
+DIGEST_SIZE = 16
+
+
+class IncrementalParser(object):
+    def __init__(self, path: str, use_sections: bool = True):
+        super(IncrementalParser, self).__init__()
+        self.path = path
+        self.use_sections = use_sections
+        self.elf: ELF = None            # 上一次的解析结果
+        self.signatures: Dict[str, tuple] = dict()     # 表名 -> 签名
+        self.segments: Dict[str, int] = dict()         # symtab/dynsym -> 在 symbol_table 中的段下标
+        self.report: dict = None
+
+    def parse(self) -> ELF:
+        '''
+        解析文件的当前内容, 内容未变的表沿用上一次的结果; 返回新的 ELF(已关闭映射, 表都已解析)
+        '''
+        start = time.perf_counter()
+        elf = ELF(self.path, use_mmap=True, use_sections=self.use_sections)
+        self.report = {'path': self.path, 'decoded': [], 'reused': [], 'hashed_bytes': 0}
+        signatures = dict()
+        try:
+            view = elf.get_view()
+            if not elf.is_valid():
+                raise Exception("%s 不是有效的 ELF 文件" % (self.path))
+            previous = self.elf
+            if previous is not None and previous.decoder is not elf.decoder:   # 位数或字节序变化, 全部重新解码
+                previous = None
+            self.parse_tables(elf, view, previous, signatures)
+            for strtabs in (elf._shstrtabs, elf._strtabs, elf._dynstrs):   # 文件之后会被改写, 字符串表不能引用映射
+                if strtabs is not None:
+                    strtabs.detach()
+        finally:
+            elf.close()
+        self.elf = elf
+        self.signatures = signatures
+        self.report['seconds'] = time.perf_counter() - start
+        return elf
+
+    def parse_tables(self, elf: ELF, view: memoryview, previous: ELF, signatures: dict):
+        ehdr = elf.elf_header.elf_ehdr
+
+        def table(name: str, ranges, fields: tuple, decode: Callable):
+            signature = signatures[name] = self.signature(view, ranges)
+            if previous is not None and signature is not None and signature == self.signatures.get(name):
+                for field in fields:
+                    setattr(elf, field, getattr(previous, field))
+                self.report['reused'].append(name)
+            else:
+                decode()
+                self.report['decoded'].append(name)
+
+        table('phdr', self.locate(lambda: [(ehdr.e_phoff, ehdr.e_phnum * ehdr.e_phentsize, ehdr.e_phentsize)]),
+              ('_program_header_table',), lambda: elf.program_header_table)
+        if self.use_sections:
+            table('sections', self.locate(lambda: self.section_ranges(elf, view)),
+                  ('_shstrtabs', '_section_header_table', '_sections_by_name', '_sections_by_type'),
+                  lambda: elf.section_header_table)
+        table('dynamic', self.locate(lambda: self.dynamic_ranges(elf)), ('_dynamic_table',), lambda: elf.dynamic_table)
+        table('strtab', self.locate(lambda: self.section_range(elf.get_linked_section(elf.get_symtab(), 3)
+                                                               or elf.get_section('.strtab'))),
+              ('_strtabs',), lambda: elf.strtabs)
+        table('dynstr', self.locate(lambda: self.dynstr_ranges(elf)), ('_dynstrs',), lambda: elf.dynstrs)
+        self.parse_symbols(elf, view, previous, signatures)
+
+    def parse_symbols(self, elf: ELF, view: memoryview, previous: ELF, signatures: dict):
+        '''
+        .symtab 和 .dynsym 分别判断, 未变的一段从上一次的 symbol_table 切片复制
+        '''
+        try:
+            segments = self.symbol_segments(elf)
+        except Exception as err:
+            print(str(err))
+            self.segments = dict()
+            elf.symbol_table
+            self.report['decoded'].append('symbols')
+            return
+        sym_size = elf.decoder.sym.LAYOUT.size
+        symbols = elf._symbol_table = SymbolTable()
+        indexes = dict()
+        for name, offset, num, entsize, strtabs in segments:
+            if num <= 0:
+                continue
+            signature = signatures[name] = self.signature(view, [(offset, (num - 1) * entsize + sym_size, entsize)])
+            index = self.segments.get(name)
+            if previous is not None and index is not None and signature == self.signatures.get(name):
+                symbols.extend_segment(previous._symbol_table, index, strtabs)
+                self.report['reused'].append(name)
+            else:
+                self.report['decoded'].append(name)
+                try:
+                    elf.read_symbols(None, offset, num, entsize, strtabs)
+                except Exception as err:
+                    print(str(err))
+                    continue
+            indexes[name] = len(symbols.segment_starts) - 1
+        self.segments = indexes
+
+    def signature(self, view: memoryview, ranges: List[tuple]) -> tuple:
+        '''
+        ranges: [(偏移, 大小, 表项大小)], 为 None 时(位置未知)返回 None
+        '''
+        if ranges is None:
+            return None
+        signature = []
+        for offset, size, entsize in ranges:
+            data = view[offset:offset + size]
+            self.report['hashed_bytes'] += len(data)
+            signature.append((size, entsize, hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()))
+        return tuple(signature)
+
+    @staticmethod
+    def locate(ranges: Callable[[], List[tuple]]) -> List[tuple]:
+        '''
+        确定表的位置时出错(头部被篡改等)按位置未知处理, 由正常的解析流程报告错误
+        '''
+        try:
+            return ranges()
+        except Exception:
+            return None
+
+    @staticmethod
+    def section_range(shdr) -> List[tuple]:
+        return [(shdr.sh_offset, shdr.sh_size, shdr.sh_entsize)] if shdr else []
+
+    @staticmethod
+    def section_ranges(elf: ELF, view: memoryview) -> List[tuple]:
+        '''
+        节头表和 .shstrtab; 节名来自 .shstrtab, 两者都未变时节头表才能沿用
+        '''
+        ehdr = elf.elf_header.elf_ehdr
+        shdr = elf.decoder.shdr.unpack_table(view, ehdr.e_shoff + ehdr.e_shtrndx * ehdr.e_shentsize, 1, ehdr.e_shentsize)[0]
+        return [(ehdr.e_shoff, ehdr.e_shnum * ehdr.e_shentsize, ehdr.e_shentsize), (shdr.sh_offset, shdr.sh_size, 0)]
+
+    @staticmethod
+    def dynamic_ranges(elf: ELF) -> List[tuple]:
+        dynamic = elf.get_dynamic()
+        if dynamic:
+            return [(dynamic.sh_offset, dynamic.sh_size, dynamic.sh_entsize)]
+        for phdr in elf.program_header_table:
+            if phdr.p_type == 2:    # PT_DYNAMIC
+                return [(phdr.p_offset, phdr.p_filesz, 0)]
+        return []
+
+    @classmethod
+    def dynstr_ranges(cls, elf: ELF) -> List[tuple]:
+        shdr = elf.get_linked_section(elf.get_dynsym(), 3) or elf.get_section('.dynstr')
+        if shdr:
+            return cls.section_range(shdr)
+        table = elf.get_dynamic_range('DT_STRTAB', 'DT_STRSZ')
+        return [table + (0,)] if table else []
+
+    @staticmethod
+    def symbol_segments(elf: ELF) -> List[tuple]:
+        '''
+        [(表名, 偏移, 符号个数, 表项大小, 字符串表)], 顺序与 symbol_table 中的段一致
+        '''
+        segments = []
+        for name in ('symtab', 'dynsym'):
+            table = elf.locate_symbols(name)
+            if table:
+                segments.append((name,) + table)
+        return segments
+
+def stat_key(path: str) -> tuple:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def watch(paths: List[str], pattern: str = '*.so', interval: float = 1.0, use_sections: bool = True,
+          with_diff: bool = False, cycles: int = None) -> Iterator[dict]:
+    '''
+    轮询 paths 下的文件, 每次新增、改写或删除产生一条记录; cycles 为轮询次数, None 为一直运行
+
+    文件的 (大小, mtime, inode) 在相邻两次轮询中相同, 或 mtime 早于一个轮询间隔之前, 才解析, 避免读到写了一半的文件
+    '''
+    parsers: Dict[str, IncrementalParser] = dict()
+    seen: Dict[str, tuple] = dict()      # 路径 -> 上一次轮询看到的 stat
+    parsed: Dict[str, tuple] = dict()    # 路径 -> 上一次解析时的 stat
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        if cycle:
+            time.sleep(interval)
+        cycle += 1
+        current = dict()
+        for path in walk(paths, pattern):
+            try:
+                current[path] = stat_key(path)
+            except OSError:
+                continue
+        for path in list(parsed):
+            if path not in current:
+                del parsed[path], parsers[path]
+                yield {'path': path, 'event': 'removed'}
+        for path, key in current.items():
+            if parsed.get(path) == key or (seen.get(path) != key and time.time_ns() - key[1] < interval * 1e9):
+                continue
+            parser = parsers.get(path) or IncrementalParser(path, use_sections)
+            previous = parser.elf
+            result = {'path': path, 'event': 'changed' if previous is not None else 'added'}
+            with capture(result):
+                elf = parser.parse()
+                if with_diff and previous is not None:
+                    result['changes'] = list(diff(previous, elf))
+                result.update(parser.report)
+            parsers[path] = parser
+            parsed[path] = key
+            yield result
+        seen = current
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='增量解析 ELF 文件: 监视文件改写, 只重新解码变化的表')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    watch_parser = subparsers.add_parser('watch', help='轮询目录或文件, 输出 JSON Lines')
+    watch_parser.add_argument('paths', nargs='+', help='目录或文件')
+    watch_parser.add_argument('-p', '--pattern', default='*.so', help='文件名匹配模式')
+    watch_parser.add_argument('-i', '--interval', type=float, default=1.0, help='轮询间隔(秒)')
+    watch_parser.add_argument('--cycles', type=int, default=None, help='轮询次数, 默认一直运行')
+    watch_parser.add_argument('--diff', action='store_true', help='改写后附带与上一版本的差异')
+    watch_parser.add_argument('--no-sections', action='store_true', help='不读取节头, 只通过程序头和 .dynamic 解析')
+    args = parser.parse_args(argv)
+
+    try:
+        for result in watch(args.paths, args.pattern, args.interval, not args.no_sections, args.diff, args.cycles):
+            print(json.dumps(result), flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -8,11 +8,20 @@
 """
 
 from io import TextIOWrapper
+import mmap
 import os
-from elf32 import Elf32_Ehdr, Elf32_Phdr, Elf32_Shdr, Elf32_Sym, Elf32_Dym
-from elf64 import Elf64_Ehdr, Elf64_Phdr, Elf64_Shdr, Elf64_Sym, Elf64_Dym
+import elflog
+import elfstats
+from hashtab import GnuHashTable, SysvHashTable
+from symbolize import AddressIndex
+from reloc import RelocationTable
+from segmap import SegmentMap
+from strtab import StringTable
+from symtab import CHUNK, SymbolTable
+from versions import SymbolVersions
+from decoder import Decoder, get_decoder
 from base import Elf_e_ident, Elf_Ehdr, Elf_Shdr, Elf_Phdr, Elf_Sym, Elf_Dym
-from typing import List
+from typing import Callable, Iterator, List
 
 '''
 - 源码路径：/external/llvm/include/llvm/Support/ELF.h
@@ -36,26 +45,31 @@ from typing import List
 '''
 
 class Elf_header(object):
-    def __init__(self, file: TextIOWrapper):
+    SIZE = 64   # 64 位 ELF 头的大小, 32 位为 52, 一次读取即可覆盖
+
+    def __init__(self, file: TextIOWrapper = None, data: bytes = None):
         super(Elf_header, self).__init__()
         self.elf_ehdr: Elf_Ehdr = None
+        self.decoder: Decoder = None    # 由 (ei_class, ei_data) 确定, 之后各张表都通过它选择结构体类型
         self.file = file
-        self.read_header()
+        if data is None:
+            self.file.seek(0)
+            data = self.file.read(Elf_header.SIZE)
+        self.read_header(data)
 
-    def read_header(self):
-        e_ident = self.init_e_ident()
-        self.elf_ehdr.read_Ehdr(self.file, e_ident)
+    def read_header(self, data: bytes):
+        e_ident = self.init_e_ident(data)
+        self.elf_ehdr = self.elf_ehdr.unpack_table(data, 16, 1, self.elf_ehdr.LAYOUT.size)[0]
+        self.elf_ehdr.read_e_ident(e_ident)
+        tracer = elflog.get_tracer()
+        if tracer is not None:
+            tracer.record(self.elf_ehdr)
 
 
-    def init_e_ident(self) -> object:
-        e_ident = Elf_e_ident()
-        e_ident.read_e_ident(self.file)
-        if e_ident.ei_class_2 == 1:    # 32位
-            self.elf_ehdr = Elf32_Ehdr()
-        elif e_ident.ei_class_2 == 2:  # 64位
-            self.elf_ehdr = Elf64_Ehdr()
-        else:
-            raise ("e_ident -> ei_class_2 数据异常:%d" % (e_ident.ei_class_2))
+    def init_e_ident(self, data: bytes) -> object:
+        e_ident = Elf_e_ident.from_bytes(data)
+        self.decoder = get_decoder(e_ident.ei_class_2, e_ident.ei_data)
+        self.elf_ehdr = self.decoder.ehdr
         return e_ident
 
 
@@ -63,50 +77,295 @@ class Elf_header(object):
 
 
 class ELF(object):
-    def __init__(self, path: str):
+    '''
+    各张表在第一次访问时才解析并缓存, 只关心 ELF 头或 .dynamic 的调用方不需要解析符号表:
+
+        with ELF(path) as elf:
+            elf.elf_header.elf_ehdr.e_machine    # 只读取文件前 64 字节
+            elf.dynamic_table                    # 只解析 段表/.shstrtab/.dynamic
+
+    read_elf() 仍会一次性解析全部表; ELF.peek_header(path) 只读文件头, 用于大批量分类
+
+    path 除文件路径外, 也可以是 bytes/bytearray/memoryview(直接在缓冲区上解析, 不拷贝),
+    或可 seek 的二进制文件对象(由调用方负责关闭), 如 APK 中的 .so, 见 apk.py
+
+    stats 为 elfstats.ParseStats 时记录每个阶段的耗时、read/seek 次数、读取字节数和分配的对象数, 见 elfstats.py;
+    未指定时使用 elfstats.collect() 设置的汇总对象, 都没有则关闭(不包装文件对象, 没有额外开销)
+
+    use_sections=False 时与安卓动态链接器一样只依赖程序头: 不读取节头, .dynamic 由 PT_DYNAMIC 定位,
+    .dynsym/.dynstr 由 DT_SYMTAB/DT_STRTAB 定位, .dynsym 的大小由哈希表确定, 用于节头被抹掉或篡改的 so;
+    默认模式下节头中找不到 .dynamic/.dynsym/.dynstr 时也会自动改用这种方式
+    '''
+    def __init__(self, path, use_mmap: bool = False, tracer: elflog.Tracer = None, use_sections: bool = True,
+                 stats: elfstats.ParseStats = None):
         super(ELF, self).__init__()
-        self.path: str = path
-        self.elf_header: Elf_header = None
-        self.program_header_table: List[Elf_Phdr] = list()
-        self.section_header_table: List[Elf_Shdr] = list()
-        self.symbol_table: List[Elf_Sym] = list()
-        self.dynamic_table: List[Elf_Dym] = list()
-        self.shstrtabs: str = None
-        self.strtabs: str = None
-        self.dynstrs: str = None
+        self.path: str = path if isinstance(path, (str, os.PathLike)) else None
+        self.use_mmap: bool = use_mmap   # True: 通过 mmap 映射文件, 表与节内容直接在映射上解析, 不拷贝
+        self.file: TextIOWrapper = None
+        self.own_file: bool = True       # file 是否由 ELF 打开, 调用方传入的文件对象不由 ELF 关闭
+        self.mmap: mmap.mmap = None
+        self.view: memoryview = None
+        if isinstance(path, (bytes, bytearray, memoryview)):
+            self.view = memoryview(path).cast('B')
+        elif self.path is None:
+            self.file = path
+            self.own_file = False
+        self.tracer: elflog.Tracer = tracer  # 逐字段日志, None 为关闭, 见 elflog.py
+        self.stats: elfstats.ParseStats = stats if stats is not None else elfstats.get_collector()
+        if self.stats is not None and self.file is not None:
+            self.file = elfstats.CountingFile(self.file, self.stats)
+        self.use_sections: bool = use_sections   # False: 不读取节头, 各表只通过程序头和 .dynamic 定位
+        self._elf_header: Elf_header = None
+        self._header_error: str = None      # 读取 ELF 头失败的原因, 失败只报告一次, 不再重试
+        self._program_header_table: List[Elf_Phdr] = None
+        self._section_header_table: List[Elf_Shdr] = None
+        self._symbol_table: SymbolTable = None
+        self._dynamic_table: List[Elf_Dym] = None
+        self._shstrtabs: StringTable = None
+        self._strtabs: StringTable = None
+        self._dynstrs: StringTable = None
+        self._sections_by_name: dict = None  # 节名 -> Elf_Shdr(同名取第一个)
+        self._sections_by_type: dict = None  # sh_type -> [Elf_Shdr], 按节头表顺序
+        self._dynsym_hash: tuple = None      # (哈希表, .dynsym 偏移, .dynstr 偏移, 符号表项大小)
+        self._segment_map: SegmentMap = None     # PT_LOAD 段的地址/偏移索引
+        self._symbol_index: dict = None      # 符号名 -> Elf_Sym, 用于 .symtab 的查找
+        self._address_index: AddressIndex = None
+        self._relocations: RelocationTable = None
+        self._symbol_versions: SymbolVersions = None
+
+    @staticmethod
+    def peek_header(path: str) -> Elf_header:
+        '''
+        只读取文件前 64 字节解析 ELF 头, 不打开 mmap, 不解析任何表
+        '''
+        with open(path, 'rb') as file:
+            return Elf_header(data=file.read(Elf_header.SIZE))
 
     def read_elf(self):
-        if not os.path.exists(self.path):
+        if self.path is not None and not os.path.exists(self.path):
             return
-        with open(self.path, 'rb', True) as files:
-            self.read_elf_header(files)
-            self.read_program_header_table(files)
-            self.get_shstrtab(files)
-            self.read_section_header_table(files)
-            self.get_strtab(files)
-            self.read_symbol_table(files)
-            self.get_dynstr(files)
-            self.read_dynamic_symbol_table(files)
-            self.read_dynamic_table(files)
+        opened = self.file is None
+        try:
+            self.open_file()
+            if self.elf_header is None:     # 头部无效时其余各表都无从定位, 错误已报告一次
+                return
+            self.program_header_table
+            self.section_header_table
+            self.symbol_table
+            self.dynamic_table
+        finally:
+            if opened:
+                self.close_file()
+
+    def load(self, *readers):
+        '''
+        在 tracer 生效的上下文中依次调用 reader(file), 文件在第一次使用时打开
+        '''
+        token = elflog.activate(self.tracer)
+        stats = self.stats
+        try:
+            if stats is None:
+                file = self.get_file()
+                for reader in readers:
+                    reader(file)
+                return
+            file = self.open_file()
+            for reader in readers:
+                with stats.stage(reader.__name__):
+                    reader(file)
+        finally:
+            elflog.deactivate(token)
+
+    def open_file(self) -> TextIOWrapper:
+        '''
+        与 get_file 相同, 记录统计时打开文件(和映射)的耗时计入 open 阶段
+        '''
+        if self.stats is not None and self.file is None and self.view is None:
+            with self.stats.stage('open'):
+                return self.get_file()
+        return self.get_file()
+
+    def get_file(self) -> TextIOWrapper:
+        '''
+        返回用于 seek/read 的文件对象; 已有缓冲区或映射时不需要文件, 返回 None
+        '''
+        if self.file is None and self.view is None:
+            self.file = open(self.path, 'rb')
+            if self.stats is not None:
+                self.file = elfstats.CountingFile(self.file, self.stats)
+            if self.use_mmap and self.view is None:
+                self.open_mmap(self.file)
+        return self.file
+
+    @property
+    def elf_header(self) -> Elf_header:
+        if self._elf_header is None and self._header_error is None:
+            self.load(self.read_elf_header)
+        return self._elf_header
+
+    @property
+    def program_header_table(self) -> List[Elf_Phdr]:
+        if self._program_header_table is None:
+            self._program_header_table = list()
+            self.load(self.read_program_header_table)
+        return self._program_header_table
+
+    @property
+    def shstrtabs(self) -> StringTable:
+        if self._shstrtabs is None:
+            self.load(self.get_shstrtab)
+        return self._shstrtabs
+
+    @property
+    def section_header_table(self) -> List[Elf_Shdr]:
+        if self._section_header_table is None:
+            self._section_header_table = list()
+            self.load(self.read_section_header_table)
+        return self._section_header_table
+
+    @property
+    def strtabs(self) -> StringTable:
+        if self._strtabs is None:
+            self.load(self.get_strtab)
+        return self._strtabs
+
+    @property
+    def symbol_table(self) -> SymbolTable:
+        if self._symbol_table is None:
+            self._symbol_table = SymbolTable()
+            self.load(self.read_symbol_table, self.read_dynamic_symbol_table)
+        return self._symbol_table
+
+    @property
+    def dynstrs(self) -> StringTable:
+        if self._dynstrs is None:
+            self.load(self.get_dynstr)
+        return self._dynstrs
+
+    @property
+    def dynamic_table(self) -> List[Elf_Dym]:
+        if self._dynamic_table is None:
+            self._dynamic_table = list()
+            self.load(self.read_dynamic_table)
+        return self._dynamic_table
+
+    @property
+    def relocations(self) -> RelocationTable:
+        if self._relocations is None:
+            self._relocations = RelocationTable(self.elf_header.elf_ehdr.e_machine)
+            self.load(self.read_relocations)
+        return self._relocations
+
+    @property
+    def symbol_versions(self) -> SymbolVersions:
+        if self._symbol_versions is None:
+            self._symbol_versions = SymbolVersions()
+            self.load(self.read_symbol_versions)
+        return self._symbol_versions
+
+    def open_mmap(self, file: TextIOWrapper):
+        '''
+        只读映射整个文件; 映射在 close() 之前一直有效, 多个进程映射同一文件时共享页缓存
+        '''
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mmap)
+
+    def close_file(self):
+        if self.file is not None and self.own_file:
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        self.close_file()
+        self._dynsym_hash = None    # 哈希表引用映射上的切片, 关闭后按需在新的映射上重建
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:     # 调用方仍持有节内容切片, 交给 GC 回收
+                pass
+            self.mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def read_data(self, file: TextIOWrapper, offset: int, size: int):
+        '''
+        读取 [offset, offset + size) 的数据, mmap 模式下返回零拷贝的 memoryview 切片
+        '''
+        if self.view is not None:
+            if offset + size > len(self.view):
+                raise Exception("读取越界: offset=0x%x size=%d" % (offset, size))
+            if self.stats is not None:
+                self.stats.mapped(size)
+            return self.view[offset:offset + size]
+        file.seek(offset)
+        return file.read(size)
+
+    def read_string_table(self, file: TextIOWrapper, offset: int, size: int) -> StringTable:
+        '''
+        mmap 模式下字符串表直接引用映射(在 mmap 上查找 \\0), 不拷贝; 缓冲区输入同样在原对象上查找
+        '''
+        data = self.read_data(file, offset, size)
+        if self.mmap is not None:
+            return StringTable(data, source=self.mmap, base=offset)
+        if self.view is not None and isinstance(self.view.obj, bytes) and len(self.view) == len(self.view.obj):
+            return StringTable(data, source=self.view.obj, base=offset)
+        return StringTable(data)
+
+    def read_records(self, file: TextIOWrapper, record_class: type, offset: int, num: int, entsize: int) -> list:
+        if self.view is not None and num > 0:
+            data = self.read_data(file, offset, (num - 1) * entsize + record_class.LAYOUT.size)
+            records = record_class.unpack_table(data, 0, num, entsize)
+        else:
+            records = record_class.read_table(file, offset, num, entsize)
+        if self.stats is not None:
+            self.stats.records(len(records))
+        tracer = elflog.get_tracer()
+        if tracer is not None:
+            tracer.records(records)
+        return records
+
+    def get_section_data(self, shdr: Elf_Shdr):
+        '''
+        获取节的内容, mmap 模式或缓冲区输入时为 memoryview 切片(不拷贝), 否则从文件读取
+        '''
+        if shdr.sh_type == 8:   # SHT_NOBITS, 如 .bss, 在文件中不占空间
+            return b''
+        return self.read_data(self.get_file(), shdr.sh_offset, shdr.sh_size)
 
     def read_elf_header(self, file: TextIOWrapper):
         try:
-            self.elf_header = Elf_header(file)
+            self._elf_header = Elf_header(data=self.read_data(file, 0, Elf_header.SIZE))
         except Exception as err:
+            self._header_error = str(err) or type(err).__name__
             print(str(err))
 
+    def is_valid(self) -> bool:
+        '''
+        ELF 头可以读取且魔数为 7F 45 4C 46
+        '''
+        return self.elf_header is not None and self.elf_header.elf_ehdr.e_ident.file_identification == ['\x7f', 'E', 'L', 'F']
+
+    @property
+    def decoder(self) -> Decoder:
+        '''
+        本文件的位数和字节序对应的结构体类型与整数布局, 见 decoder.py
+        '''
+        return self.elf_header.decoder
+
     def read_program_header_table(self, file: TextIOWrapper):
         try:
-            for i in range(self.elf_header.elf_ehdr.e_phnum):
-                if self.elf_header.elf_ehdr.e_ident.ei_class_2 == 1:    # 32位
-                    phdr = Elf32_Phdr()
-                elif self.elf_header.elf_ehdr.e_ident.ei_class_2 == 2:  # 64位
-                    phdr = Elf64_Phdr()
-                else:
-                    raise ("e_ident -> ei_class_2 数据异常:%d" % (self.elf_header.elf_ehdr.e_ident.ei_class_2))
-                file.seek(self.elf_header.elf_ehdr.e_phoff + i * self.elf_header.elf_ehdr.e_phentsize)
-                phdr.read_Phdr(file)
-                self.program_header_table.append(phdr)
+            ehdr = self.elf_header.elf_ehdr
+            phdr_class = self.decoder.phdr
+            self._program_header_table.extend(self.read_records(file, phdr_class, ehdr.e_phoff, ehdr.e_phnum, ehdr.e_phentsize))
         except Exception as err:
             print(str(err))
 
@@ -114,125 +373,168 @@ class ELF(object):
         '''
         获取段表字符串表
         '''
-        file.seek(self.elf_header.elf_ehdr.e_shoff + self.elf_header.elf_ehdr.e_shtrndx * self.elf_header.elf_ehdr.e_shentsize)
-        if self.elf_header.elf_ehdr.e_ident.ei_class_2 == 1:    # 32位
-            shdr = Elf32_Shdr()
-        elif self.elf_header.elf_ehdr.e_ident.ei_class_2 == 2:  # 64位
-            shdr = Elf64_Shdr()
-        else:
-            raise ("e_ident -> ei_class_2 数据异常:%d" % (self.elf_header.elf_ehdr.e_ident.ei_class_2))
-        shdr.read_Shdr(file)
-        file.seek(shdr.sh_offset)
-        self.shstrtabs = file.read(shdr.sh_size).decode('utf-8')
+        if not self.use_sections:
+            return
+        ehdr = self.elf_header.elf_ehdr
+        shdr_class = self.decoder.shdr
+        shdr = self.read_records(file, shdr_class, ehdr.e_shoff + ehdr.e_shtrndx * ehdr.e_shentsize, 1, ehdr.e_shentsize)[0]
+        self._shstrtabs = self.read_string_table(file, shdr.sh_offset, shdr.sh_size)
 
 
     def read_section_header_table(self, file: TextIOWrapper):
         try:
-            
-            for i in range(self.elf_header.elf_ehdr.e_shnum):
-                if self.elf_header.elf_ehdr.e_ident.ei_class_2 == 1:    # 32位
-                    shdr = Elf32_Shdr()
-                elif self.elf_header.elf_ehdr.e_ident.ei_class_2 == 2:  # 64位
-                    shdr = Elf64_Shdr()
-                else:
-                    raise ("e_ident -> ei_class_2 数据异常:%d" % (self.elf_header.elf_ehdr.e_ident.ei_class_2))
-                file.seek(self.elf_header.elf_ehdr.e_shoff + i * self.elf_header.elf_ehdr.e_shentsize)
-                shdr.read_Shdr(file)
-                shdr.read_section_name(self.shstrtabs)
-                self.section_header_table.append(shdr)
+            if self.use_sections:
+                ehdr = self.elf_header.elf_ehdr
+                shdr_class = self.decoder.shdr
+                for shdr in self.read_records(file, shdr_class, ehdr.e_shoff, ehdr.e_shnum, ehdr.e_shentsize):
+                    shdr.read_section_name(self.shstrtabs)
+                    self._section_header_table.append(shdr)
         except Exception as err:
             print(str(err))
+        self.index_sections()
+
+    def index_sections(self):
+        '''
+        按节名和 sh_type 建立索引, 只在读取节头表时建立一次, 之后的按名/按类型查找都是 O(1)
+        '''
+        self._sections_by_name = dict()
+        self._sections_by_type = dict()
+        for shdr in self._section_header_table:
+            self._sections_by_name.setdefault(shdr.section_name, shdr)
+            self._sections_by_type.setdefault(shdr.sh_type, []).append(shdr)
+
+    def get_section(self, name: str) -> Elf_Shdr:
+        '''
+        按节名精确查找, 没有则返回 None
+        '''
+        self.section_header_table
+        return self._sections_by_name.get(name)
+
+    def sections_by_type(self, sh_type: int) -> List[Elf_Shdr]:
+        '''
+        sh_type(如 SHT_SYMTAB=2, SHT_DYNSYM=11, SHT_DYNAMIC=6) 的全部节, 按节头表顺序
+        '''
+        self.section_header_table
+        return list(self._sections_by_type.get(sh_type, ()))
+
+    def find_section(self, sh_type: int, name: str) -> Elf_Shdr:
+        '''
+        先按类型查找(不受节名篡改影响), 没有再按节名精确查找
+        '''
+        sections = self.sections_by_type(sh_type)
+        return sections[0] if sections else self.get_section(name)
+
+    def get_linked_section(self, shdr: Elf_Shdr, sh_type: int) -> Elf_Shdr:
+        '''
+        shdr.sh_link 指向的节, 类型不是 sh_type 则返回 None; 符号表通过 sh_link 指定对应的字符串表
+        '''
+        sections = self.section_header_table
+        if shdr is not None and 0 < shdr.sh_link < len(sections) and sections[shdr.sh_link].sh_type == sh_type:
+            return sections[shdr.sh_link]
+        return None
 
     def get_strtab(self, file: TextIOWrapper):
         '''
-        获取字符串表
+        获取字符串表: .symtab 的 sh_link 指向的节, 没有则按节名 .strtab 查找
         '''
-        for shdr in self.section_header_table:
-            if shdr.section_name.find('.strtab') != -1:
-                file.seek(shdr.sh_offset)
-                self.strtabs = file.read(shdr.sh_size).decode('utf-8')
-                return
+        shdr = self.get_linked_section(self.get_symtab(), 3) or self.get_section('.strtab')     # SHT_STRTAB
+        if shdr:
+            self._strtabs = self.read_string_table(file, shdr.sh_offset, shdr.sh_size)
 
     def get_symtab(self) -> Elf_Shdr:
         '''
         获取符号表
         '''
-        for symtab in self.section_header_table:
-            if symtab.section_name.find('.symtab') != -1:
-                return symtab
-        return None
+        return self.find_section(2, '.symtab')      # SHT_SYMTAB
 
     def read_symbol_table(self, file: TextIOWrapper): 
         '''
         .symtab -> symbol_table
         '''
         try:
-            shdr = self.get_symtab()
-            if shdr:
-                idx = shdr.sh_size / shdr.sh_entsize
-                for i in range(int(idx)):
-                    if self.elf_header.elf_ehdr.e_ident.ei_class_2 == 1:    # 32位
-                        sym = Elf32_Sym()
-                    elif self.elf_header.elf_ehdr.e_ident.ei_class_2 == 2:  # 64位
-                        sym = Elf64_Sym()
-                    else:
-                        raise ("e_ident -> ei_class_2 数据异常:%d" % (self.elf_header.elf_ehdr.e_ident.ei_class_2))
-                    file.seek(shdr.sh_offset + i * shdr.sh_entsize)
-                    sym.read_Sym(file)
-                    sym.read_sym_name(self.strtabs)
-                    self.symbol_table.append(sym)
+            table = self.locate_symbols('symtab')
+            if table:
+                self.read_symbols(file, *table)
         except Exception as err:
             print(str(err))
 
+    def read_symbols(self, file: TextIOWrapper, offset: int, num: int, entsize: int, strtabs: StringTable):
+        '''
+        整张符号表一次读出, 按列追加到 symbol_table, 不为每个符号创建对象
+        '''
+        sym_class = self.decoder.sym
+        if num <= 0:
+            return
+        size = (num - 1) * entsize + sym_class.LAYOUT.size
+        data = self.read_data(file, offset, size)
+        if len(data) < size:
+            raise Exception("%s 表越界: offset=0x%x num=%d" % (sym_class.__name__, offset, num))
+        self._symbol_table.extend(sym_class, data, num, entsize, strtabs)
+        if self.stats is not None:
+            self.stats.records(num)
+        tracer = elflog.get_tracer()
+        if tracer is not None:
+            tracer.records(sym_class.unpack_table(data, 0, num, entsize))
+
     def get_dynstr(self, file: TextIOWrapper):
         '''
-        获取动态字符串表
+        获取动态字符串表: .dynsym 的 sh_link 指向的节, 没有则按节名 .dynstr 查找
         '''
-        for shdr in self.section_header_table:
-            if shdr.section_name.find('.dynstr') != -1:
-                file.seek(shdr.sh_offset)
-                self.dynstrs = file.read(shdr.sh_size).decode('utf-8')
-                return
+        shdr = self.get_linked_section(self.get_dynsym(), 3) or self.get_section('.dynstr')    # SHT_STRTAB
+        if shdr:
+            self._dynstrs = self.read_string_table(file, shdr.sh_offset, shdr.sh_size)
+            return
+        try:
+            table = self.get_dynamic_range('DT_STRTAB', 'DT_STRSZ')     # 没有节头时由 .dynamic 定位
+            if table:
+                self._dynstrs = self.read_string_table(file, *table)
+        except Exception as err:
+            print(str(err))
             
     def get_dynsym(self) -> Elf_Shdr:
         '''
         获取动态符号表
         '''
-        for symtab in self.section_header_table:
-            if symtab.section_name.find('.dynsym') != -1:
-                return symtab
-        return None
+        return self.find_section(11, '.dynsym')     # SHT_DYNSYM
     
     def read_dynamic_symbol_table(self, file: TextIOWrapper): 
         '''
         .dynsym -> dynamic_symbol_table
         '''
         try:
-            shdr = self.get_dynsym()
-            if shdr:
-                idx = shdr.sh_size / shdr.sh_entsize
-                for i in range(int(idx)):
-                    if self.elf_header.elf_ehdr.e_ident.ei_class_2 == 1:    # 32位
-                        sym = Elf32_Sym()
-                    elif self.elf_header.elf_ehdr.e_ident.ei_class_2 == 2:  # 64位
-                        sym = Elf64_Sym()
-                    else:
-                        raise ("e_ident -> ei_class_2 数据异常:%d" % (self.elf_header.elf_ehdr.e_ident.ei_class_2))
-                    file.seek(shdr.sh_offset + i * shdr.sh_entsize)
-                    sym.read_Sym(file)
-                    sym.read_sym_name(self.dynstrs)
-                    self.symbol_table.append(sym)
+            table = self.locate_symbols('dynsym')
+            if table:
+                self.read_symbols(file, *table)
         except Exception as err:
             print(str(err))
 
+    def locate_symbols(self, table: str) -> tuple:
+        '''
+        table 为 'symtab' 或 'dynsym', 返回 (偏移, 符号个数, 表项大小, 字符串表), 没有则返回 None;
+        .dynsym 在节头中找不到时由 DT_SYMTAB 定位, 表的大小由哈希表确定; 节头的 sh_entsize 为 0 时按 Elf_Sym 的大小计算
+        '''
+        if table == 'symtab':
+            shdr = self.get_symtab()
+            if not shdr:
+                return None
+            entsize = shdr.sh_entsize or self.decoder.sym.LAYOUT.size
+            return shdr.sh_offset, shdr.sh_size // entsize, entsize, self.strtabs
+        if table != 'dynsym':
+            raise Exception("未知的符号表: %s" % (table))
+        shdr = self.get_dynsym()
+        if shdr:
+            entsize = shdr.sh_entsize or self.decoder.sym.LAYOUT.size
+            return shdr.sh_offset, shdr.sh_size // entsize, entsize, self.dynstrs
+        if self.get_dynsym_hash():
+            hash_table, symtab, strtab, syment = self._dynsym_hash
+            return symtab, hash_table.symbol_count(), syment, self.dynstrs
+        return None
+
     def get_dynamic(self) -> Elf_Shdr:
         '''
         获取动态表
         '''
-        for dynamic in self.section_header_table:
-            if dynamic.section_name.find('.dynamic') != -1:
-                return dynamic
-        return None
+        return self.find_section(6, '.dynamic')     # SHT_DYNAMIC
     
     def read_dynamic_table(self, file: TextIOWrapper):
         '''
@@ -241,27 +543,332 @@ class ELF(object):
                                   IDA貌似是通过段表字符串表来确定每个段的地址
         '''
         try:
-            dynamic = self.get_dynamic()
-            if dynamic:
-                idx = dynamic.sh_size / dynamic.sh_entsize
-                for i in range(int(idx)):
-                    if self.elf_header.elf_ehdr.e_ident.ei_class_2 == 1:    # 32位
-                        dym = Elf32_Dym()
-                    elif self.elf_header.elf_ehdr.e_ident.ei_class_2 == 2:  # 64位
-                        dym = Elf64_Dym()
-                    else:
-                        raise ("e_ident -> ei_class_2 数据异常:%d" % (self.elf_header.elf_ehdr.e_ident.ei_class_2))
-                    file.seek(dynamic.sh_offset + i * dynamic.sh_entsize)
-                    dym.read_Dym(file)
-                    self.dynamic_table.append(dym)
+            table = self.locate_dynamic()
+            if table:
+                self._dynamic_table.extend(self.read_records(file, self.decoder.dym, *table))
+        except Exception as err:
+            print(str(err))
+
+    def locate_dynamic(self) -> tuple:
+        '''
+        .dynamic 的 (偏移, 表项个数, 表项大小), 节头中找不到时由 PT_DYNAMIC 定位, 都没有则返回 None;
+        节头的 sh_entsize 为 0 时按 Elf_Dym 的大小计算
+        '''
+        dynamic = self.get_dynamic()
+        if dynamic:
+            entsize = dynamic.sh_entsize or self.decoder.dym.LAYOUT.size
+            return dynamic.sh_offset, dynamic.sh_size // entsize, entsize
+        for phdr in self.program_header_table:
+            if phdr.p_type == 2:    # PT_DYNAMIC, 动态链接器通过它找到 .dynamic
+                entsize = self.decoder.dym.LAYOUT.size
+                return phdr.p_offset, phdr.p_filesz // entsize, entsize
+        return None
+
+    def iter_records(self, record_class: type, offset: int, num: int, entsize: int, chunk: int = CHUNK) -> Iterator:
+        '''
+        分块读取并解码 num 个表项, 每块 chunk 项, 内存中只保留当前块; 生成器被关闭(调用方 break)后不再读取
+        '''
+        size = record_class.LAYOUT.size
+        for start in range(0, num, chunk):
+            count = min(chunk, num - start)
+            data = self.read_data(self.get_file(), offset + start * entsize, (count - 1) * entsize + size)
+            if len(data) < (count - 1) * entsize + size:
+                raise Exception("%s 表越界: offset=0x%x num=%d" % (record_class.__name__, offset, num))
+            if self.stats is not None:
+                self.stats.records(count)
+            yield from record_class.unpack_table(data, 0, count, entsize)
+
+    def iter_symbols(self, table: str = 'dynsym', predicate: Callable[[Elf_Sym], bool] = None,
+                     chunk: int = CHUNK) -> Iterator[Elf_Sym]:
+        '''
+        流式遍历 table('dynsym'/'symtab'), 逐个产生带 sym_name 的 Elf_Sym, predicate 为 None 或返回真的才产生;
+        不填充 symbol_table, 峰值内存与符号个数无关(字符串表仍整张读入一次)
+
+            jni = [sym for sym in elf.iter_symbols(predicate=lambda sym: sym.sym_name.startswith('Java_'))]
+        '''
+        located = self.locate_symbols(table)
+        if located is None:
+            return
+        offset, num, entsize, strtabs = located
+        for sym in self.iter_records(self.decoder.sym, offset, num, entsize, chunk):
+            if strtabs is not None:
+                sym.read_sym_name(strtabs)
+            if predicate is None or predicate(sym):
+                yield sym
+
+    def iter_sections(self, chunk: int = CHUNK) -> Iterator[Elf_Shdr]:
+        '''
+        流式遍历节头表, 逐个产生带 section_name 的 Elf_Shdr, 不填充 section_header_table
+        '''
+        if not self.use_sections:
+            return
+        ehdr = self.elf_header.elf_ehdr
+        shstrtabs = self.shstrtabs
+        for shdr in self.iter_records(self.decoder.shdr, ehdr.e_shoff, ehdr.e_shnum, ehdr.e_shentsize, chunk):
+            shdr.read_section_name(shstrtabs)
+            yield shdr
+
+    def iter_dynamic(self, chunk: int = CHUNK) -> Iterator[Elf_Dym]:
+        '''
+        流式遍历 .dynamic, 不填充 dynamic_table; 定位方式与 read_dynamic_table 相同
+        '''
+        table = self.locate_dynamic()
+        if table:
+            yield from self.iter_records(self.decoder.dym, *table, chunk)
+
+    def get_view(self) -> memoryview:
+        '''
+        返回整个文件的只读映射, 未开启 mmap 模式时按需映射; 调用方传入的文件对象一次性读入内存
+        '''
+        if self.view is None:
+            file = self.get_file()
+            if self.own_file:
+                self.open_mmap(file)
+            else:
+                file.seek(0)
+                self.view = memoryview(file.read())
+        return self.view
+
+    def get_dynamic_entry(self, tag: str) -> int:
+        '''
+        返回 .dynamic 中第一个类型为 tag(如 'DT_SYMTAB') 的 d_un, 没有则返回 None
+        '''
+        d_tag = Elf_Dym.TAG[tag]
+        for dym in self.dynamic_table:
+            if dym.d_tag == d_tag:
+                return dym.d_un
+        return None
+
+    def get_segment_map(self) -> SegmentMap:
+        if self._segment_map is None:
+            self._segment_map = SegmentMap(self.program_header_table)
+        return self._segment_map
+
+    def vaddr_to_offset(self, vaddr: int) -> int:
+        '''
+        通过 PT_LOAD 段把虚拟地址转换为文件偏移, 不在任何段的文件映像内则返回 None
+        '''
+        return self.get_segment_map().vaddr_to_offset(vaddr)
+
+    def offset_to_vaddr(self, offset: int) -> int:
+        return self.get_segment_map().offset_to_vaddr(offset)
+
+    def vaddrs_to_offsets(self, vaddrs: List[int]) -> List[int]:
+        return self.get_segment_map().vaddrs_to_offsets(vaddrs)
+
+    def offsets_to_vaddrs(self, offsets: List[int]) -> List[int]:
+        return self.get_segment_map().offsets_to_vaddrs(offsets)
+
+    def read_at_vaddr(self, vaddr: int, size: int) -> memoryview:
+        '''
+        读取虚拟地址 [vaddr, vaddr + size) 的内容, 返回文件映射上的 memoryview 切片(不拷贝)
+        区间必须落在同一个段的文件映像内
+        '''
+        segments = self.get_segment_map()
+        i = segments.find(vaddr)
+        if i < 0 or vaddr + size > segments.vaddr_ends[i]:
+            raise Exception("虚拟地址不在段的文件映像内: vaddr=0x%x size=%d" % (vaddr, size))
+        offset = vaddr - segments.vaddr_starts[i] + segments.vaddr_offsets[i]
+        view = self.get_view()
+        if offset + size > len(view):
+            raise Exception("读取越界: offset=0x%x size=%d" % (offset, size))
+        return view[offset:offset + size]
+
+    def get_dynsym_hash(self) -> tuple:
+        '''
+        解析 DT_GNU_HASH(优先) 或 DT_HASH 指向的哈希表, 只解析一次
+        '''
+        if self._dynsym_hash is None:
+            self._dynsym_hash = ()
+            symtab = self.vaddr_to_offset(self.get_dynamic_entry('DT_SYMTAB') or 0)
+            strtab = self.vaddr_to_offset(self.get_dynamic_entry('DT_STRTAB') or 0)
+            if not symtab or not strtab:
+                return self._dynsym_hash
+            decoder = self.decoder
+            syment = self.get_dynamic_entry('DT_SYMENT') or decoder.sym.LAYOUT.size
+            view = self.get_view()
+            gnu_hash = self.vaddr_to_offset(self.get_dynamic_entry('DT_GNU_HASH') or 0)
+            sysv_hash = self.vaddr_to_offset(self.get_dynamic_entry('DT_HASH') or 0)
+            if gnu_hash:
+                table = GnuHashTable(view, gnu_hash, decoder.word_size, decoder.byte_order)
+            elif sysv_hash:
+                table = SysvHashTable(view, sysv_hash, decoder.byte_order)
+            else:
+                return self._dynsym_hash
+            self._dynsym_hash = (table, symtab, strtab, syment)
+        return self._dynsym_hash
+
+    def get_symbol_index(self) -> dict:
+        '''
+        符号名 -> Elf_Sym 的字典索引, 同名时保留 symbol_table 中靠前的(.symtab 在 .dynsym 之前)
+        '''
+        if self._symbol_index is None:
+            self._symbol_index = dict()
+            symbols = self.symbol_table
+            for index, name in enumerate(symbols.names()):
+                if name:
+                    self._symbol_index.setdefault(name, symbols[index])
+        return self._symbol_index
+
+    def lookup_dynamic_symbol(self, name: str) -> Elf_Sym:
+        '''
+        通过二进制自带的哈希表在 .dynsym 中查找符号, 只解码命中的那一项
+        '''
+        if not self.get_dynsym_hash():
+            return None
+        table, symtab, strtab, syment = self._dynsym_hash
+        view = self.get_view()
+        needle = name.encode('utf-8') + b'\0'
+        st_name = self.decoder.u32      # 32/64 位的 st_name 都是表项的第一个字段
+
+        def match(index: int) -> bool:
+            start = strtab + st_name.unpack_from(view, symtab + index * syment)[0]
+            return view[start:start + len(needle)] == needle
+
+        index = table.lookup(needle[:-1], match)
+        if index is None:
+            return None
+        sym = self.decoder.sym.unpack_table(view, symtab + index * syment, 1, syment)[0]
+        sym.sym_name = name
+        return sym
+
+    def lookup_symbol(self, name: str) -> Elf_Sym:
+        '''
+        按名字查找符号: 先查 .dynsym 的哈希表, 找不到再查名字索引(覆盖 .symtab)
+        '''
+        sym = self.lookup_dynamic_symbol(name)
+        if sym is None:
+            sym = self.get_symbol_index().get(name)
+        return sym
+
+    def get_address_index(self) -> AddressIndex:
+        if self._address_index is None:
+            thumb = self.elf_header.elf_ehdr.e_machine == 40     # EM_ARM
+            self._address_index = AddressIndex(self.symbol_table, thumb)
+        return self._address_index
+
+    def symbolize(self, addr: int) -> Elf_Sym:
+        '''
+        返回 [st_value, st_value + st_size) 包含 addr 的符号, 没有则返回 None
+        '''
+        return self.get_address_index().lookup(addr)
+
+    def symbolize_many(self, addrs: List[int]) -> List[Elf_Sym]:
+        return self.get_address_index().lookup_many(addrs)
+
+    def get_dynamic_range(self, tag: str, size_tag: str) -> tuple:
+        '''
+        .dynamic 中 tag 指向的表的 (文件偏移, 大小), 没有或为空则返回 None
+        '''
+        vaddr = self.get_dynamic_entry(tag)
+        size = self.get_dynamic_entry(size_tag)
+        if not vaddr or not size:
+            return None
+        offset = self.vaddr_to_offset(vaddr)
+        if offset is None:
+            raise Exception("%s 不在任何 PT_LOAD 段内: 0x%x" % (tag, vaddr))
+        return offset, size
+
+    def read_relocations(self, file: TextIOWrapper):
+        '''
+        DT_ANDROID_REL(A) / DT_RELR / DT_REL(A) / DT_JMPREL -> relocations
+        与动态链接器一样通过 .dynamic 定位各表, 不依赖节头
+        '''
+        try:
+            decoder = self.decoder
+            word_size, rel_class, rela_class = decoder.word_size, decoder.rel, decoder.rela
+            jmprel = self.get_dynamic_range('DT_JMPREL', 'DT_PLTRELSZ')
+            tables = []
+            for tag, size_tag, record in (('DT_REL', 'DT_RELSZ', rel_class), ('DT_RELA', 'DT_RELASZ', rela_class)):
+                table = self.get_dynamic_range(tag, size_tag)
+                if table:
+                    offset, size = table
+                    if jmprel and offset <= jmprel[0] < offset + size:    # 部分链接器的 DT_RELASZ 包含 .rela.plt
+                        size = jmprel[0] - offset
+                    tables.append((tag, record, offset, size))
+            if jmprel:
+                tables.append(('DT_JMPREL', rela_class if self.get_dynamic_entry('DT_PLTREL') == 7 else rel_class) + jmprel)
+            for tag, size_tag in (('DT_ANDROID_REL', 'DT_ANDROID_RELSZ'), ('DT_ANDROID_RELA', 'DT_ANDROID_RELASZ')):
+                table = self.get_dynamic_range(tag, size_tag)
+                if table:
+                    self._relocations.extend_android(self.read_data(file, *table), word_size, tag)
+            for tag, size_tag in (('DT_RELR', 'DT_RELRSZ'), ('DT_ANDROID_RELR', 'DT_ANDROID_RELRSZ')):
+                table = self.get_dynamic_range(tag, size_tag)
+                if table:
+                    self._relocations.extend_relr(self.read_data(file, *table), word_size, tag, decoder.byte_order)
+            for tag, record, offset, size in tables:
+                num = size // record.LAYOUT.size
+                data = self.read_data(file, offset, num * record.LAYOUT.size)
+                self._relocations.extend(record, data, num, record.LAYOUT.size, tag)
+                tracer = elflog.get_tracer()
+                if tracer is not None:
+                    tracer.records(record.unpack_table(data, 0, num, record.LAYOUT.size))
+            if self.stats is not None:
+                self.stats.records(len(self._relocations))
+        except Exception as err:
+            print(str(err))
+
+    def read_symbol_versions(self, file: TextIOWrapper):
+        '''
+        DT_VERSYM / DT_VERDEF / DT_VERNEED -> symbol_versions
+        与动态链接器一样通过 .dynamic 定位; versym 的项数与 .dynsym 相同
+        '''
+        try:
+            versions = self._symbol_versions
+            decoder = self.decoder
+            versym = self.vaddr_to_offset(self.get_dynamic_entry('DT_VERSYM') or 0)
+            dynsym = self.locate_symbols('dynsym')
+            if versym and dynsym:
+                versions.read_versym(self.read_data(file, versym, dynsym[1] * 2), dynsym[1], decoder)
+                if self.stats is not None:
+                    self.stats.records(dynsym[1])
+            strtabs = self.dynstrs
+            if strtabs is None:
+                return
+            for tag, num_tag, reader in (('DT_VERDEF', 'DT_VERDEFNUM', versions.read_definitions),
+                                         ('DT_VERNEED', 'DT_VERNEEDNUM', versions.read_requirements)):
+                offset = self.vaddr_to_offset(self.get_dynamic_entry(tag) or 0)
+                num = self.get_dynamic_entry(num_tag)
+                if offset and num:
+                    reader(self.get_view(), offset, num, decoder, strtabs)
         except Exception as err:
             print(str(err))
+
+    def versioned_dynamic_symbol_names(self) -> List[str]:
+        '''
+        按 .dynsym 下标排列的 name@VERSION / name@@VERSION(本文件定义的默认版本), 没有版本信息的符号为原名
+        '''
+        symbols = self.symbol_table
+        for index in range(len(symbols.segment_starts) - 1, -1, -1):     # .dynsym 是字符串表为 dynstrs 的那一段
+            if symbols.strtabs[index] is not None and symbols.strtabs[index] is self.dynstrs:
+                start, end = symbols.segment_range(index)
+                return self.symbol_versions.versioned_names(self.dynstrs.get_many(symbols.st_name[start:end]))
+        return []
+
+    def get_dynamic_symbol_name(self, index: int) -> str:
+        '''
+        通过 DT_SYMTAB 取 .dynsym 第 index 项的符号名, 重定位的 r_sym 是这张表的下标
+        '''
+        symtab = self.vaddr_to_offset(self.get_dynamic_entry('DT_SYMTAB') or 0)
+        if not symtab or self.dynstrs is None:
+            return None
+        decoder = self.decoder
+        syment = self.get_dynamic_entry('DT_SYMENT') or decoder.sym.LAYOUT.size
+        return self.dynstrs.get(decoder.u32.unpack_from(self.get_view(), symtab + index * syment)[0])
+
+    def relocations_by_symbol(self) -> dict:
+        '''
+        符号名 -> 引用该符号的全部重定位项(RelocationView), 用于导入符号/GOT 分析
+        '''
+        relocations = self.relocations
+        return {self.get_dynamic_symbol_name(sym): [relocations[i] for i in indices]
+                for sym, indices in relocations.group_by_symbol().items()}
+
 # *****************************************************************************************
 if __name__ == '__main__':
     file64name = './arm64-v8a/libnative-lib.so'
-    file64name2 = './arm64-v8a/libart.so'
     file32name = './armeabi-v7a/libnative-lib.so'
-    elf = ELF(file64name2)
+    elf = ELF(file64name)
     elf.read_elf()
 
 
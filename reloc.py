@@ -0,0 +1,290 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : reloc.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Iterator
+
+'''
+动态重定位表, 与 symtab.py 一样按列存储: r_offset / r_type / r_sym / r_addend 各一个 array.array
+- DT_REL / DT_RELA / DT_JMPREL: 整张表一次 frombytes 后按步长切片得到各列, 不逐项构造对象
+- DT_ANDROID_REL / DT_ANDROID_RELA: 安卓的 APS2 压缩格式(SLEB128 分组编码), 先一次解出全部整数, 再按组切片、用 accumulate 还原 r_offset 和加数
+- DT_RELR / DT_ANDROID_RELR: 只记录地址的相对重定位(地址 + 位图), 类型为各架构的 RELATIVE, 没有符号
+REL 格式的加数保存在被修改的位置, 表中记为 0
+大端文件的整数在 frombytes 之后整列 byteswap 一次, 之后的处理与小端相同
+'''
+
+COLUMNS = (('r_offset', 'Q'), ('r_type', 'I'), ('r_sym', 'I'), ('r_addend', 'q'))
+
+RELATIVE = {3: 8,       # EM_386:     R_386_RELATIVE
+            40: 23,     # EM_ARM:     R_ARM_RELATIVE
+            62: 8,      # EM_X86_64:  R_X86_64_RELATIVE
+            183: 1027,  # EM_AARCH64: R_AARCH64_RELATIVE
+            243: 3}     # EM_RISCV:   R_RISCV_RELATIVE
+
+APS2_MAGIC = b'APS2'
+GROUPED_BY_INFO = 1
+GROUPED_BY_OFFSET_DELTA = 2
+GROUPED_BY_ADDEND = 4
+GROUP_HAS_ADDEND = 8
+
+
+def decode_sleb128(data: bytes, offset: int = 0) -> list:
+    '''
+    一次解码 data[offset:] 中全部的 SLEB128 整数
+    '''
+    values = []
+    append = values.append
+    value = shift = 0
+    for byte in data[offset:]:
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            if byte & 0x40:
+                value -= 1 << shift
+            append(value)
+            value = shift = 0
+    return values
+
+
+def load_words(typecode: str, data, byte_order: str) -> array:
+    '''
+    把 data 按文件字节序('<' 或 '>')解释为 array(typecode)
+    '''
+    words = array(typecode)
+    words.frombytes(data)
+    if (byte_order == '>') != (sys.byteorder == 'big'):
+        words.byteswap()
+    return words
+
+
+def wrap(values: list, mask: int) -> list:
+    '''
+    SLEB128 解出的值按字长回绕为无符号数, 只在确有越界时才逐项处理
+    '''
+    if values and (min(values) < 0 or max(values) > mask):
+        return [value & mask for value in values]
+    return values
+
+
+def split_info(infos: array, word_size: int) -> tuple:
+    '''
+    把 r_info 列拆成 (r_type, r_sym): 32位为 sym << 8 | type, 64位为 sym << 32 | type
+    '''
+    if word_size == 8:      # 64 位直接按 32 位重新解释, 不逐项移位
+        halves = array('I')
+        halves.frombytes(infos.tobytes())
+        if sys.byteorder == 'little':
+            return halves[0::2], halves[1::2]
+        return halves[1::2], halves[0::2]
+    return array('I', [info & 0xff for info in infos]), array('I', [info >> 8 for info in infos])
+
+
+class RelocationTable(object):
+    def __init__(self, machine: int = 0):
+        super(RelocationTable, self).__init__()
+        self.machine = machine      # e_machine, 决定 RELR 的重定位类型
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS}
+        self.r_offset = self.columns['r_offset']
+        self.r_type = self.columns['r_type']
+        self.r_sym = self.columns['r_sym']
+        self.r_addend = self.columns['r_addend']
+        self.segment_starts = []    # 每段在表中的起始下标
+        self.kinds = []             # 每段的来源, 如 'DT_RELA'、'DT_JMPREL'、'DT_RELR'
+
+    def append_segment(self, kind: str, offsets: array, types: array, syms: array, addends: array):
+        self.segment_starts.append(len(self))
+        self.kinds.append(kind)
+        for column, values in ((self.r_offset, offsets), (self.r_type, types), (self.r_sym, syms), (self.r_addend, addends)):
+            if values.typecode != column.typecode:     # 32 位的列先转换为统一的类型
+                values = array(column.typecode, values)
+            column.extend(values)
+
+    def extend(self, rel_class: type, data, num: int, entsize: int, kind: str):
+        '''
+        从 data(整张 .rel(a).dyn/.rel(a).plt 的内容) 批量追加 num 项, rel_class 为 ElfXX_Rel/ElfXX_Rela
+        '''
+        size = rel_class.LAYOUT.size
+        width = len(rel_class.FIELDS)
+        word_size = size // width
+        if entsize != size:     # 非标准表项大小, 先拷贝为紧凑排列
+            data = b''.join(bytes(data[i * entsize:i * entsize + size]) for i in range(num))
+        words = load_words('I' if word_size == 4 else 'Q', data[:num * size], rel_class.LAYOUT.format[0])
+        types, syms = split_info(words[1::width], word_size)
+        if width == 3:
+            addends = array('i' if word_size == 4 else 'q')
+            addends.frombytes(words[2::3].tobytes())
+        else:
+            addends = array('q', bytes(8 * num))
+        self.append_segment(kind, words[0::width], types, syms, addends)
+
+    def extend_android(self, data, word_size: int, kind: str):
+        '''
+        解码 APS2 格式: magic, 总数, 初始 r_offset, 之后为若干组:
+        组大小, 组标志, [组内共同的 offset 增量], [组内共同的 r_info], [组内共同的加数增量], 每项未分组的字段
+        '''
+        if bytes(data[:4]) != APS2_MAGIC:
+            raise Exception("%s 不是 APS2 格式" % (kind))
+        mask = (1 << (word_size * 8)) - 1
+        values = decode_sleb128(bytes(data), 4)
+        count, r_offset = values[0], values[1]
+        pos = 2
+        offsets, infos, addends = array('Q'), array('Q'), array('q')
+        addend = 0
+        while len(offsets) < count:     # 每组的未分组字段交错排列, 按步长切片后用 accumulate 求前缀和
+            group_size, flags = values[pos], values[pos + 1]
+            pos += 2
+            if group_size <= 0:
+                raise Exception("%s 组大小异常: %d" % (kind, group_size))
+            by_offset = flags & GROUPED_BY_OFFSET_DELTA
+            by_info = flags & GROUPED_BY_INFO
+            has_addend = flags & GROUP_HAS_ADDEND
+            by_addend = has_addend and flags & GROUPED_BY_ADDEND
+            if by_offset:
+                offset_delta = values[pos]
+                pos += 1
+            if by_info:
+                info = values[pos]
+                pos += 1
+            if by_addend:
+                addend += values[pos]
+                pos += 1
+            elif not has_addend:
+                addend = 0
+            stride = (not by_offset) + (not by_info) + bool(has_addend and not by_addend)
+            block = values[pos:pos + stride * group_size]
+            pos += stride * group_size
+            if len(block) < stride * group_size:
+                raise Exception("%s 数据不完整" % (kind))
+            column = 0
+            if by_offset:
+                group = list(range(r_offset + offset_delta, r_offset + offset_delta * (group_size + 1), offset_delta or 1)) \
+                    if offset_delta else [r_offset] * group_size
+            else:
+                group = list(accumulate(block[column::stride], initial=r_offset))[1:]
+                column += 1
+            offsets.extend(wrap(group, mask))
+            r_offset = offsets[-1]
+            if by_info:
+                infos.extend([info & mask] * group_size)
+            else:
+                infos.extend(wrap(block[column::stride], mask))
+                column += 1
+            if has_addend and not by_addend:
+                group = list(accumulate(block[column::stride], initial=addend))[1:]
+                addends.extend(group)
+                addend = group[-1]
+            else:
+                addends.extend([addend] * group_size)
+        types, syms = split_info(infos, word_size)
+        self.append_segment(kind, offsets, types, syms, addends)
+
+    def extend_relr(self, data, word_size: int, kind: str, byte_order: str = '<'):
+        '''
+        解码 RELR: 偶数项为地址, 奇数项为位图, 第 i 位(i >= 1)表示 base + (i - 1) * word_size 需要重定位
+        '''
+        words = load_words('I' if word_size == 4 else 'Q', data[:len(data) // word_size * word_size], byte_order)
+        offsets = array('Q')
+        append = offsets.append
+        span = (word_size * 8 - 1) * word_size     # 一个位图覆盖的字节数
+        base = 0
+        for word in words:
+            if not word & 1:
+                append(word)
+                base = word + word_size
+                continue
+            bits = word >> 1
+            where = base
+            while bits:
+                if bits & 1:
+                    append(where)
+                bits >>= 1
+                where += word_size
+            base += span
+        num = len(offsets)
+        self.append_segment(kind, offsets, array('I', [RELATIVE.get(self.machine, 0)]) * num,
+                            array('I', bytes(4 * num)), array('q', bytes(8 * num)))
+
+    def column(self, name: str) -> array:
+        return self.columns[name]
+
+    def kind(self, index: int) -> str:
+        return self.kinds[bisect_right(self.segment_starts, index) - 1]
+
+    def group_by_symbol(self) -> dict:
+        '''
+        r_sym -> 该符号所有重定位项的下标(array), 不含 r_sym 为 0(无符号)的项
+        '''
+        groups = dict()
+        for index, sym in enumerate(self.r_sym):
+            if sym:
+                group = groups.get(sym)
+                if group is None:
+                    group = groups[sym] = array('I')
+                group.append(index)
+        return groups
+
+    def __len__(self) -> int:
+        return len(self.r_offset)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RelocationView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('relocation index out of range')
+        return RelocationView(self, index)
+
+    def __iter__(self) -> Iterator['RelocationView']:
+        for i in range(len(self)):
+            yield RelocationView(self, i)
+
+
+class RelocationView(object):
+    '''
+    RelocationTable 中一项的只读视图, 只保存表和下标
+    '''
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table: RelocationTable, index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def r_offset(self) -> int:
+        return self.table.r_offset[self.index]
+
+    @property
+    def r_type(self) -> int:
+        return self.table.r_type[self.index]
+
+    @property
+    def r_sym(self) -> int:
+        return self.table.r_sym[self.index]
+
+    @property
+    def r_addend(self) -> int:
+        return self.table.r_addend[self.index]
+
+    @property
+    def kind(self) -> str:
+        return self.table.kind(self.index)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RelocationView) and self.table is other.table and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.index))
+
+    def __repr__(self) -> str:
+        return 'RelocationView(%d, %s, r_offset=0x%x, r_type=%d, r_sym=%d, r_addend=%d)' \
+            % (self.index, self.kind, self.r_offset, self.r_type, self.r_sym, self.r_addend)
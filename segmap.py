@@ -0,0 +1,98 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : segmap.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+from array import array
+from bisect import bisect_right
+from typing import List
+from base import Elf_Phdr
+
+'''
+虚拟地址 <-> 文件偏移, 由 PT_LOAD 段建立两份有序索引(按 p_vaddr 和按 p_offset), 查找为二分
+只覆盖段的文件映像 [p_vaddr, p_vaddr + p_filesz), .bss 等只在内存中的部分没有文件偏移
+'''
+
+PT_LOAD = 1
+UNROLL_LIMIT = 8    # 段数不超过此值时, 批量转换使用展开的比较链
+
+
+def compile_converter(starts: array, ends: array, deltas: list):
+    '''
+    生成展开的批量转换函数(与 Elf_Record 生成 __init__ 的做法相同):
+    段数很少时, 逐段比较的列表推导比对每个地址做二分快数倍
+    '''
+    expr = ' '.join('value + %d if %d <= value < %d else' % (delta, start, end)
+                    for start, end, delta in zip(starts, ends, deltas))
+    namespace = {}
+    exec('def convert(values):\n    return [%s None for value in values]' % expr, {}, namespace)
+    return namespace['convert']
+
+
+class SegmentMap(object):
+    def __init__(self, phdrs: List[Elf_Phdr]):
+        super(SegmentMap, self).__init__()
+        loads = [phdr for phdr in phdrs if phdr.p_type == PT_LOAD and phdr.p_filesz]
+        by_vaddr = sorted(loads, key=lambda phdr: phdr.p_vaddr)
+        self.vaddr_starts = array('Q', (phdr.p_vaddr for phdr in by_vaddr))
+        self.vaddr_ends = array('Q', (phdr.p_vaddr + phdr.p_filesz for phdr in by_vaddr))
+        self.vaddr_offsets = array('Q', (phdr.p_offset for phdr in by_vaddr))
+        by_offset = sorted(loads, key=lambda phdr: phdr.p_offset)
+        self.offset_starts = array('Q', (phdr.p_offset for phdr in by_offset))
+        self.offset_ends = array('Q', (phdr.p_offset + phdr.p_filesz for phdr in by_offset))
+        self.offset_vaddrs = array('Q', (phdr.p_vaddr for phdr in by_offset))
+        self.vaddr_converter = None     # 批量转换函数, 第一次批量转换时生成
+        self.offset_converter = None
+
+    def find(self, vaddr: int) -> int:
+        '''
+        返回包含 vaddr 的段在 vaddr_starts 中的下标, 不在任何段的文件映像内则返回 -1
+        '''
+        i = bisect_right(self.vaddr_starts, vaddr) - 1
+        if i >= 0 and vaddr < self.vaddr_ends[i]:
+            return i
+        return -1
+
+    def vaddr_to_offset(self, vaddr: int) -> int:
+        i = self.find(vaddr)
+        if i < 0:
+            return None
+        return vaddr - self.vaddr_starts[i] + self.vaddr_offsets[i]
+
+    def offset_to_vaddr(self, offset: int) -> int:
+        i = bisect_right(self.offset_starts, offset) - 1
+        if i >= 0 and offset < self.offset_ends[i]:
+            return offset - self.offset_starts[i] + self.offset_vaddrs[i]
+        return None
+
+    def vaddrs_to_offsets(self, vaddrs: List[int]) -> List[int]:
+        '''
+        批量转换, 返回值与 vaddrs 一一对应, 不在段内的为 None
+        '''
+        if self.vaddr_converter is None:
+            self.vaddr_converter = self.make_converter(self.vaddr_starts, self.vaddr_ends, self.vaddr_offsets)
+        return self.vaddr_converter(vaddrs)
+
+    def offsets_to_vaddrs(self, offsets: List[int]) -> List[int]:
+        if self.offset_converter is None:
+            self.offset_converter = self.make_converter(self.offset_starts, self.offset_ends, self.offset_vaddrs)
+        return self.offset_converter(offsets)
+
+    @staticmethod
+    def make_converter(starts: array, ends: array, targets: array):
+        deltas = [target - start for start, target in zip(starts, targets)]
+        if len(starts) <= UNROLL_LIMIT:
+            return compile_converter(starts, ends, deltas)
+
+        def convert(values: List[int]) -> List[int]:
+            result = []
+            append = result.append
+            for value in values:
+                i = bisect_right(starts, value) - 1
+                append(value + deltas[i] if i >= 0 and value < ends[i] else None)
+            return result
+        return convert
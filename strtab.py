@@ -0,0 +1,142 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : strtab.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+import sys
+from functools import lru_cache, partial
+from itertools import accumulate
+from typing import Dict, Iterable, List
+
+'''
+字符串表(.shstrtab/.strtab/.dynstr), 直接在原始字节上按偏移取名:
+- 偏移是字节偏移, 用 find(b'\\0', offset) 找结尾, 含多字节字符时也不会错位
+- mmap 模式下表不拷贝: 保存映射上的切片, 在 mmap 上 find; 持有切片期间映射不会被关闭,
+  要在文件改写后继续使用的表先调用 detach() 拷贝为 bytes
+- 只解码用到的名字, 非 UTF-8 字节按 \\xNN 显示, 不会抛异常; 批量取名时纯 ASCII 的表整体解码一次, 在 str 上查找
+- 按偏移取名(get)时名字经过 sys.intern, 各表中重复的名字只保存一份; 最近使用的偏移有 LRU 缓存
+- split() 一次切分整张表, 得到 偏移 -> 名字, 用于一次取全部符号名
+'''
+
+ENCODING = 'utf-8'
+ERRORS = 'backslashreplace'
+
+
+def decode(raw: bytes) -> str:
+    return sys.intern(raw.decode(ENCODING, ERRORS))
+
+
+def find_name(source, base: int, size: int, offset: int) -> str:
+    '''
+    source[base:base + size] 为字符串表, 解码其中 offset 处以 \\0 结尾的名字
+    '''
+    end = source.find(b'\0', base + offset, base + size)
+    if end < 0:
+        end = base + size
+    return decode(source[base + offset:end])
+
+
+class StringTable(object):
+    def __init__(self, data, cache_size: int = 4096, source=None, base: int = 0):
+        '''
+        data: 整张字符串表的内容; 不是 bytes 且没有给出 source 时拷贝为 bytes 一次(memoryview 没有 find)
+        source/base: data 所在的可 find 的对象(mmap 或 bytes)和 data 在其中的起始偏移, 给出时不拷贝
+        cache_size: LRU 缓存的名字个数
+        '''
+        super(StringTable, self).__init__()
+        if source is None:
+            data = data if isinstance(data, bytes) else bytes(data)
+            source = data
+            base = 0
+        self.data = data            # mmap 模式下是映射上的切片, 持有期间映射不会被关闭
+        self.source = source
+        self.base = base
+        self.cache_size = cache_size
+        self.get = lru_cache(maxsize=cache_size)(partial(find_name, source, base, len(data)))    # 不引用 self, 没有循环引用
+        self._ascii: bool = None                # 是否纯 ASCII, 第一次批量取名时确定
+        self._text: str = None                  # 纯 ASCII 的表整体解码的结果(末尾补 \0)
+        self._names: Dict[int, str] = None      # split() 的结果, 第一次调用时生成
+
+    def detach(self):
+        '''
+        把内容拷贝为 bytes, 不再引用映射; 文件可能被改写或截断后还要继续使用时调用, 见 incremental.py
+        '''
+        if self.source is not self.data:
+            self.data = self.source = bytes(self.data)
+            self.base = 0
+            self.get = lru_cache(maxsize=self.cache_size)(partial(find_name, self.data, 0, len(self.data)))
+
+    def get_text(self) -> str:
+        '''
+        纯 ASCII 的表整体解码为 str(字节偏移与字符下标一致); 含非 ASCII 字节时返回 None
+        '''
+        if self._ascii is None:
+            raw = bytes(self.data)
+            self._ascii = raw.isascii()         # 绝大多数表是纯 ASCII
+            if self._ascii:
+                self._text = str(raw, 'ascii') + '\0'
+        return self._text
+
+    def decode_at(self, offset: int) -> str:
+        '''
+        不经过缓存, 解码 offset 处以 \\0 结尾的名字
+        '''
+        return find_name(self.source, self.base, len(self.data), offset)
+
+    def split(self) -> Dict[int, str]:
+        '''
+        一次切分整张表: 每个名字的起始偏移 -> 名字
+        纯 ASCII 的表整体解码后在 str 上切分, 否则逐段解码; 偏移由各段长度累加得到
+        表内每个起始偏移只对应一个对象, 这里不再 intern(对全部名字 intern 的开销与切分本身相当)
+        '''
+        if self._names is None:
+            text = self.get_text()
+            if text is not None:
+                parts = text[:-1].split('\0')
+                names = parts
+            else:
+                parts = bytes(self.data).split(b'\0')
+                names = [raw.decode(ENCODING, ERRORS) for raw in parts]
+            offsets = accumulate(map((1).__add__, map(len, parts)), initial=0)
+            self._names = dict(zip(offsets, names))
+        return self._names
+
+    def get_many(self, offsets: Iterable[int]) -> List[str]:
+        '''
+        批量取名: 纯 ASCII 的表直接在解码后的 str 上查找 \0;
+        否则查 split() 的结果, 指向名字中间的偏移(后缀合并)单独解码
+        '''
+        text = self.get_text()
+        if text is not None:
+            find = text.find
+            return [text[offset:find('\0', offset)] for offset in offsets]
+        offsets = list(offsets)
+        names = list(map(self.split().get, offsets))
+        if None in names:
+            names = [self.get(offset) if name is None else name for offset, name in zip(offsets, names)]
+        return names
+
+    def __getitem__(self, offset: int) -> str:
+        return self.get(offset)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.data)
+
+    def __str__(self) -> str:
+        return str(self.data, ENCODING, ERRORS)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, StringTable) and bytes(self.data) == bytes(other.data)
+
+    def __hash__(self) -> int:
+        return hash(bytes(self.data))
+
+    def __repr__(self) -> str:
+        return 'StringTable(%d bytes)' % (len(self.data))
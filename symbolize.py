@@ -0,0 +1,68 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : symbolize.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+from array import array
+from bisect import bisect_right
+from typing import List
+from base import Elf_Sym
+
+'''
+地址 -> 符号, 用于把 tombstone 中的 pc 还原为函数名
+符号按 st_value 排序后存入 array, 查找为二分, 索引只建一次
+'''
+
+STT_OBJECT = 1
+STT_FUNC = 2
+
+
+class AddressIndex(object):
+    def __init__(self, symbols: List[Elf_Sym], thumb: bool = False):
+        '''
+        symbols: 符号表, 只收录已定义(st_shndx != 0)且大小不为 0 的函数和数据对象
+        thumb:   32 位 ARM, 函数地址的最低位是 thumb 标志, 建索引和查找时都要去掉
+        '''
+        super(AddressIndex, self).__init__()
+        self.thumb = thumb
+        ranges = dict()     # 起始地址 -> 符号, 同一地址的别名保留范围最大的
+        for sym in symbols:
+            if sym.st_shndx == 0 or sym.st_size == 0 or (sym.st_info & 0xf) not in (STT_OBJECT, STT_FUNC):
+                continue
+            start = sym.st_value & ~1 if thumb and (sym.st_info & 0xf) == STT_FUNC else sym.st_value
+            if start not in ranges or ranges[start].st_size < sym.st_size:
+                ranges[start] = sym
+        starts = sorted(ranges)
+        self.starts = array('Q', starts)
+        self.ends = array('Q', (start + ranges[start].st_size for start in starts))
+        self.symbols: List[Elf_Sym] = [ranges[start] for start in starts]
+
+    def lookup(self, addr: int) -> Elf_Sym:
+        if self.thumb:
+            addr &= ~1
+        i = bisect_right(self.starts, addr) - 1
+        if i >= 0 and addr < self.ends[i]:
+            return self.symbols[i]
+        return None
+
+    def lookup_many(self, addrs: List[int]) -> List[Elf_Sym]:
+        '''
+        批量查找: 地址排序后依次二分, 每次的查找下界是上一次的结果, 返回值与 addrs 一一对应
+        '''
+        if self.thumb:
+            addrs = [addr & ~1 for addr in addrs]
+        result = [None] * len(addrs)
+        starts, ends, symbols = self.starts, self.ends, self.symbols
+        lo = 0
+        for n in sorted(range(len(addrs)), key=addrs.__getitem__):
+            addr = addrs[n]
+            i = bisect_right(starts, addr, lo) - 1
+            if i >= 0:
+                lo = i
+                if addr < ends[i]:
+                    result[n] = symbols[i]
+        return result
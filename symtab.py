@@ -0,0 +1,169 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : symtab.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+from array import array
+from bisect import bisect_right
+from itertools import islice
+from typing import Iterator, List
+from strtab import StringTable
+
+'''
+按列存储的符号表: 每个字段一个 array.array, 一个符号在各列中共占 24 字节(含数组预留实测约 27 字节);
+Elf_Sym 虽然使用 __slots__, 对象本身仍有 88 字节, 再加上 st_value 等大整数对象和列表中的指针,
+实测每个符号约 145-150 字节(python bench.py --symbol-memory)。
+下标访问返回轻量的 SymbolView, 属性与 Elf_Sym 相同, 符号名在访问时才从字符串表解析。
+各列可通过 column() 取得, 支持缓冲区协议, 可直接交给 numpy.frombuffer 等做向量化处理。
+'''
+
+CHUNK = 4096
+COLUMNS = (('st_name', 'I'), ('st_value', 'Q'), ('st_size', 'Q'), ('st_info', 'B'), ('st_other', 'B'), ('st_shndx', 'H'))
+
+
+class SymbolTable(object):
+    def __init__(self):
+        super(SymbolTable, self).__init__()
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS}
+        self.st_name = self.columns['st_name']
+        self.st_value = self.columns['st_value']
+        self.st_size = self.columns['st_size']
+        self.st_info = self.columns['st_info']
+        self.st_other = self.columns['st_other']
+        self.st_shndx = self.columns['st_shndx']
+        self.segment_starts = []    # 每段(.symtab/.dynsym)在表中的起始下标
+        self.strtabs = []           # 每段对应的字符串表
+
+    def extend(self, sym_class: type, data, num: int, entsize: int, strtabs: StringTable):
+        '''
+        从 data(整张 .symtab/.dynsym 的内容) 批量追加 num 个符号, strtabs 为这些符号对应的字符串表
+        '''
+        layout = sym_class.LAYOUT
+        if entsize == layout.size and len(data) == num * entsize:
+            rows = layout.iter_unpack(data)
+        else:
+            rows = (layout.unpack_from(data, i * entsize) for i in range(num))
+        start = len(self)
+        try:
+            while True:     # 分块转置, 峰值内存只与块大小有关
+                chunk = list(islice(rows, CHUNK))
+                if not chunk:
+                    break
+                for name, values in zip(sym_class.FIELDS, zip(*chunk)):
+                    self.columns[name].extend(values)
+        except Exception:
+            for column in self.columns.values():
+                del column[start:]
+            raise
+        self.segment_starts.append(start)
+        self.strtabs.append(strtabs)
+
+    def extend_segment(self, other: 'SymbolTable', index: int, strtabs: StringTable):
+        '''
+        原样追加 other 的第 index 段(各列按切片复制, 不重新解码), strtabs 为这一段新的字符串表
+        '''
+        start, end = other.segment_range(index)
+        self.segment_starts.append(len(self))
+        for name, column in self.columns.items():
+            column.extend(other.columns[name][start:end])
+        self.strtabs.append(strtabs)
+
+    def segment_range(self, index: int) -> tuple:
+        '''
+        第 index 段在表中的 [start, end)
+        '''
+        start = self.segment_starts[index]
+        end = self.segment_starts[index + 1] if index + 1 < len(self.segment_starts) else len(self)
+        return start, end
+
+    def column(self, name: str) -> array:
+        return self.columns[name]
+
+    def get_name(self, index: int) -> str:
+        strtabs = self.strtabs[bisect_right(self.segment_starts, index) - 1]
+        if strtabs is None:
+            return None
+        return strtabs.get(self.st_name[index])
+
+    def names(self) -> List[str]:
+        '''
+        全部符号名, 与下标一一对应; 每段的字符串表只切分一次, 不逐个查找 \0
+        '''
+        names = []
+        ends = self.segment_starts[1:] + [len(self)]
+        for start, end, strtabs in zip(self.segment_starts, ends, self.strtabs):
+            if strtabs is None:
+                names.extend([None] * (end - start))
+            else:
+                names.extend(strtabs.get_many(self.st_name[start:end]))
+        return names
+
+    def __len__(self) -> int:
+        return len(self.st_name)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [SymbolView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('symbol index out of range')
+        return SymbolView(self, index)
+
+    def __iter__(self) -> Iterator['SymbolView']:
+        for i in range(len(self)):
+            yield SymbolView(self, i)
+
+
+class SymbolView(object):
+    '''
+    SymbolTable 中一个符号的只读视图, 只保存表和下标
+    '''
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table: SymbolTable, index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def st_name(self) -> int:
+        return self.table.st_name[self.index]
+
+    @property
+    def st_value(self) -> int:
+        return self.table.st_value[self.index]
+
+    @property
+    def st_size(self) -> int:
+        return self.table.st_size[self.index]
+
+    @property
+    def st_info(self) -> int:
+        return self.table.st_info[self.index]
+
+    @property
+    def st_other(self) -> int:
+        return self.table.st_other[self.index]
+
+    @property
+    def st_shndx(self) -> int:
+        return self.table.st_shndx[self.index]
+
+    @property
+    def section_name(self) -> str:     # 与 Elf_Sym.read_sym_name 写入的属性一致
+        return self.table.get_name(self.index)
+
+    sym_name = section_name
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SymbolView) and self.table is other.table and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.index))
+
+    def __repr__(self) -> str:
+        return 'SymbolView(%d, %r, st_value=0x%x, st_size=%d)' % (self.index, self.section_name, self.st_value, self.st_size)
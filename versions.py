@@ -0,0 +1,139 @@
+# !/usr/bin/env python3
+# -*-coding:utf-8 -*-
+
+"""
+# File       : versions.py
+# Time       ：2026/10/18
+# Author     ：Yooha
+"""
+
+from array import array
+from typing import Dict, List, Tuple
+from decoder import Decoder
+from strtab import StringTable
+
+'''
+符号版本(.gnu.version / .gnu.version_d / .gnu.version_r), 与动态链接器一样通过 DT_VERSYM / DT_VERDEF / DT_VERNEED 定位:
+
+    versions = elf.symbol_versions
+    versions.versym[i]                      # .dynsym 第 i 个符号的版本下标(最高位为隐藏标志), array('H')
+    versions.definitions[2]                 # 'LIBFOO_1.0', 本文件定义的版本
+    versions.requirements[3]                # ('GLIBC_2.17', 'libc.so.6'), 依赖的版本及所在文件
+    elf.versioned_dynamic_symbol_names()    # ['', 'malloc@GLIBC_2.17', 'foo@@LIBFOO_1.0', ...]
+
+verdef/verneed 链只遍历一次, 得到 版本下标 -> 名字 的字典; 给全部符号加版本时先生成 versym 取值 -> 后缀 的字典,
+再与符号名逐项拼接, 不为每个符号遍历链
+'''
+
+VER_NDX_LOCAL = 0       # 局部符号, 不带版本
+VER_NDX_GLOBAL = 1      # 全局符号, 不带版本
+VERSYM_HIDDEN = 0x8000  # 隐藏版本: 只能通过 name@VERSION 显式引用
+VERSYM_INDEX = 0x7fff
+VER_FLG_BASE = 1        # 文件本身的版本定义, 名字即 soname
+
+
+class SymbolVersions(object):
+    def __init__(self):
+        super(SymbolVersions, self).__init__()
+        self.versym = array('H')        # 与 .dynsym 下标对齐
+        self.definitions: Dict[int, str] = dict()       # vd_ndx -> 版本名
+        self.parents: Dict[int, List[str]] = dict()     # vd_ndx -> 父版本名(Elf_Verdaux 链中第一项之后的)
+        self.base: str = None           # VER_FLG_BASE 的定义名
+        self.requirements: Dict[int, Tuple[str, str]] = dict()  # vna_other -> (版本名, 依赖的文件名)
+        self._suffixes: Dict[int, str] = None
+
+    def read_versym(self, data, num: int, decoder: Decoder):
+        '''
+        data 为 .gnu.version 的内容, 每个符号 2 字节; 文件在表中间结束时与其他表一样报告越界
+        '''
+        if len(data) < num * 2:
+            raise Exception("Elf_Versym 表越界: num=%d, 只有 %d 字节" % (num, len(data)))
+        self.versym = decoder.array('H', data[:num * 2])
+        self._suffixes = None
+
+    def read_definitions(self, view, offset: int, num: int, decoder: Decoder, strtabs: StringTable):
+        '''
+        遍历从 offset 开始的 num 个 Elf_Verdef 及各自的 Elf_Verdaux 链
+        '''
+        verdef, verdaux = decoder.verdef, decoder.verdaux
+        for i in range(num):
+            vd = verdef(verdef.LAYOUT.unpack_from(view, offset))
+            names = []
+            aux = offset + vd.vd_aux
+            for j in range(vd.vd_cnt):
+                vda = verdaux(verdaux.LAYOUT.unpack_from(view, aux))
+                names.append(strtabs.get(vda.vda_name))
+                aux += vda.vda_next
+                if not vda.vda_next:
+                    break
+            if names:
+                if vd.vd_flags & VER_FLG_BASE:
+                    self.base = names[0]
+                else:
+                    self.definitions[vd.vd_ndx] = names[0]
+                    if len(names) > 1:
+                        self.parents[vd.vd_ndx] = names[1:]
+            if not vd.vd_next:
+                break
+            offset += vd.vd_next
+        self._suffixes = None
+
+    def read_requirements(self, view, offset: int, num: int, decoder: Decoder, strtabs: StringTable):
+        '''
+        遍历从 offset 开始的 num 个 Elf_Verneed 及各自的 Elf_Vernaux 链
+        '''
+        verneed, vernaux = decoder.verneed, decoder.vernaux
+        for i in range(num):
+            vn = verneed(verneed.LAYOUT.unpack_from(view, offset))
+            file = strtabs.get(vn.vn_file)
+            aux = offset + vn.vn_aux
+            for j in range(vn.vn_cnt):
+                vna = vernaux(vernaux.LAYOUT.unpack_from(view, aux))
+                self.requirements[vna.vna_other] = (strtabs.get(vna.vna_name), file)
+                if not vna.vna_next:
+                    break
+                aux += vna.vna_next
+            if not vn.vn_next:
+                break
+            offset += vn.vn_next
+        self._suffixes = None
+
+    def version_name(self, index: int) -> str:
+        '''
+        versym 取值对应的版本名, 局部/全局(不带版本)或未知时返回 None
+        '''
+        index &= VERSYM_INDEX
+        if index in self.definitions:
+            return self.definitions[index]
+        if index in self.requirements:
+            return self.requirements[index][0]
+        return None
+
+    def get_suffixes(self) -> Dict[int, str]:
+        '''
+        versym 取值(含隐藏标志) -> 名字后缀: 本文件定义的默认版本为 @@VERSION, 隐藏版本和依赖的版本为 @VERSION
+        '''
+        if self._suffixes is None:
+            suffixes = dict()
+            for index, name in self.requirements.items():
+                suffixes[index] = suffixes[index | VERSYM_HIDDEN] = '@' + name[0]
+            for index, name in self.definitions.items():
+                suffixes[index] = '@@' + name
+                suffixes[index | VERSYM_HIDDEN] = '@' + name
+            self._suffixes = suffixes
+        return self._suffixes
+
+    def versioned_names(self, names: List[str]) -> List[str]:
+        '''
+        names 为按 .dynsym 下标排列的符号名, 返回带版本后缀的名字; 空名字和没有版本的符号保持原样
+        '''
+        suffixes = self.get_suffixes()
+        if not suffixes:
+            return list(names)
+        get = suffixes.get
+        versioned = [name + get(index, '') if name else name for name, index in zip(names, self.versym)]
+        versioned.extend(names[len(versioned):])
+        return versioned
+
+    def __len__(self) -> int:
+        return len(self.versym)